@@ -17,7 +17,7 @@ from juliacall import Main as jl
 jl.seval("using Jolin")
 
 # ╔═╡ e96dd32f-6bbe-469b-a23f-e80dfce9c149
-jl.seval("using JSON")
+jl.seval("using JSON, PythonCall, Dates")
 
 # ╔═╡ cf709c09-3d75-4010-b7f6-c0c588f1a63e
 jl.MD("""
@@ -34,8 +34,23 @@ This is done automatically for your. As soon as you import a package, it is inst
 """)
 
 # ╔═╡ b47d1fb4-6de6-11ef-257a-73e31baebd4e
+import base64
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import timeit
+from collections import OrderedDict
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import numpy as np
 import pandas as pd
 import plotly
+import pyarrow as pa
+from pyarrow import csv as pa_csv, feather
 from matplotlib import pyplot as plt
 
 # ╔═╡ 71ab973a-376b-408c-a2d1-9a8f5cc42053
@@ -49,16 +64,15 @@ jl.MD("""
 ## Import Data
 
 We use open co2 data from [Our World in Data - CO2 Data](https://github.com/owid/co2-data).
-""")
 
-# ╔═╡ 0a95cbef-285f-4578-8754-e4a7b97f7c6d
-df = pd.read_csv("https://nyc3.digitaloceanspaces.com/owid-public/data/co2/owid-co2-data.csv")
+The file has about 80 columns, but every view only looks at a few of them. Hence we only parse the columns we need, using compact types, and load further columns as soon as they are selected.
 
-# ╔═╡ 685f87b2-5aa5-4d47-855e-204c025449a4
-columns = list(df.columns)
+The file is parsed while it is still downloading. Every second the lines which arrived since are parsed and appended, so every line is parsed once and the data is ready as soon as the download is. The widgets offer the columns of the header and the countries and years of the complete data. They are created once and keep their selection through all updates.
 
-# ╔═╡ 4f5b8092-e8a3-4b29-9228-861d1d56bb09
-countries = list(dict.fromkeys(df["country"]))  # simple unique
+Afterwards the dashboard checks for new data every hour. As long as the file is unchanged, this costs a single conditional request and the data keeps its version, so everything derived from it is reused. Otherwise only rows which are new or changed are parsed again, and everything derived from them is updated for the affected countries only.
+
+The complete data is also kept as Feather file in the temporary directory, or in `JOLIN_SHARED_DATA` if set, which the Python and R dashboards both memory map. However many dashboards run on a host, the data is held in memory only once.
+""")
 
 # ╔═╡ ee3c7f4b-6c2a-4e9e-be93-7fe2cf2602ee
 jl.MD("""
@@ -80,62 +94,77 @@ This lets the variable `country` listen for updates on the select input.
 All these widgets can also be combined into markdown and html code using interpolation.
 """)
 
-# ╔═╡ 84fbf5bd-7805-4173-847a-af85d118ff2f
-country1, ui1 = jl.viewof("country1", jl.Select(countries, default="World"))
+# ╔═╡ 27944397-48c4-4066-80e3-3ff0c6da3579
+xaxis = "year"  # we fix the xaxis to be year
 
-# ╔═╡ 738bac24-243f-40f9-b920-dab17e8e418d
-country2, ui2 = jl.viewof("country2", jl.Select(countries, default="Germany"))
+# ╔═╡ a52c930b-016f-4a0d-a417-c901ecf48134
+jl.MD("""
+The rows are sorted by country and year. A small index built once at load time maps every country to its range of rows, and within this range the years are sorted, too. Selecting a country and a range of years is therefore a slice found by two binary searches, instead of comparing every row.
+""")
 
-# ╔═╡ a14c6e88-4370-42cb-9332-1562b3128027
-yaxis, ui3 = jl.viewof("yaxis", jl.Select(columns, default="co2_per_capita"))
+# ╔═╡ 3c2b7a4f-9a1a-46b8-9f82-43b84ca4fe5c
+jl.MD("""
+### Plotting using Matplotlib
 
-# ╔═╡ f75cac0d-4126-4825-9bb5-067a1cbf3fbe
-choose = jl.MD(f"""
-| Parameter | Choose                |
-| --------- | :-------------------- |
-| region 1  | {jl.format_html(ui1)} |
-| region 2  | {jl.format_html(ui2)} |
-| compare   | {jl.format_html(ui3)} |
+Works seamlessly.
 """)
 
-# ╔═╡ 1a104371-0421-4a31-a2e6-7975126e315c
-choose
+# ╔═╡ ed8e2bc3-8268-472f-bb40-cd027135e248
+jl.MD("""
+Users tend to flip between the same few selections. Rendered figures are therefore cached by the selection, and the figure is only drawn again for selections not seen before.
+""")
 
-# ╔═╡ dbba9ade-1f92-4db6-a4c4-d94a6e1322ab
-{"yaxis": yaxis, "country1": country1, "country2": country2}
+# ╔═╡ 729824d2-3c9f-4189-92d7-3e884f882652
+jl.MD("""
+### Plotly works too
 
-# ╔═╡ 27944397-48c4-4066-80e3-3ff0c6da3579
-xaxis = "year"  # we fix the xaxis to be year
+We can make matplotlib plots into a lovely interactive plotly plot using `jplot` (see helpers below).
 
-# ╔═╡ 8d46f7b1-ece0-4f2f-90dd-5f0bfe7573f4
-subdf1 = df[df["country"] == country1];
+For simple line charts it is even faster to skip matplotlib and build the plotly plot directly from the columns. This is what `plot_lines` does.
+""")
 
-# ╔═╡ 237078db-8ecf-4094-b673-307119c61333
-subdf2 = df[df["country"] == country2]
+# ╔═╡ c1c1b281-e220-4606-938a-37a91f18f538
+run_benchmark, ui_benchmark = jl.viewof("run_benchmark", jl.CounterButton("Compare jplot with plot_lines"))
+ui_benchmark
 
-# ╔═╡ 3c2b7a4f-9a1a-46b8-9f82-43b84ca4fe5c
+# ╔═╡ 9e41d7b3-52a6-4c08-8f1d-a6b3e0c7d295
 jl.MD("""
-### Plotting using Matplotlib
+### Sharing data with julia
 
-Works seamlessly.
+Some aggregations are faster in julia. `julia_table` hands a frame over as column table, which julia packages based on Tables.jl understand, without copying its numeric columns, and `pandas_frame` turns the result back into a frame, again without copying. Here julia computes the mean of the chosen metric per decade.
 """)
 
-# ╔═╡ c375fa35-cb06-443d-bbb4-8a0b969ec39d
-figure, ax = plt.subplots()
-ax.plot(subdf1[xaxis], subdf1[yaxis], label=country1)
-ax.plot(subdf2[xaxis], subdf2[yaxis], color="orange", label=country2)
-ax.legend(loc="upper left")
-ax.set_xlabel(xaxis)
-ax.set_ylabel(yaxis)
-figure
+# ╔═╡ b7d2f0a4-6e19-4c3b-9a85-2f4c1e8d7a06
+_decade_means = jl.seval("""t -> begin
+	decades = 10 .* fld.(Int.(t.year), 10)
+	unique_decades = unique(decades)
+	means = map(unique_decades) do decade
+		values = filter(!isnan, t.value[decades .== decade])
+		isempty(values) ? NaN : sum(values) / length(values)
+	end
+	(decade = unique_decades, mean = means)
+end""")
+
+# ╔═╡ 26687994-c3b0-45b6-93a9-5620b91217ea
+jl.MD("""
+### Comparing many regions
 
-# ╔═╡ 729824d2-3c9f-4189-92d7-3e884f882652
+To compare many regions at once, each metric is pivoted once into a matrix with one row per year and one column per country. Selecting regions is then a single column lookup, and all lines are encoded in one go.
+""")
+
+# ╔═╡ d1ff3f26-abf9-4448-a9fa-e0747301e32c
+wide_cache = {}
+
+# ╔═╡ dde6f012-45ca-4767-a157-57053a3ac999
 jl.MD("""
-### Plotly works too
+### Rankings
 
-We can make matplotlib plots into a lovely interactive plotly plot.
+Questions like "which country has the highest growth?" need a look at every country. Instead of scanning the full data on every interaction, a small summary per country and metric is computed once at load time and all rankings read from it.
 """)
 
+# ╔═╡ 6b0e9d3c-2f4a-4d51-9c0e-5a7d2e8f1b43
+summary_cache = {}
+
 # ╔═╡ 62622307-2f20-408a-a60b-86a035626bce
 jl.MD("""
 ## Helpers
@@ -146,21 +175,838 @@ We can change the order as we want - Pluto is tracking the dependencies for us.
 # ╔═╡ 47ca42ad-caef-472b-b024-68f8a3fa103b
 _jplot = jl.seval("json -> PlutoPlot(JSON.parse(Plot, json))")
 def jplot(figure):
+	return _jplot(plotly_json(figure).decode())
+
+def plotly_json(figure):
+	"""Convert a matplotlib figure to plotly json bytes. The figure is closed afterwards."""
 	plot = plotly.tools.mpl_to_plotly(figure).update_layout(
 		# enable responsive layout
 		autosize=True, width=None, height=None,
 		# reduce margins
 		margin={'l': 2, 'r':2, 't':24, 'b': 2},
 	)
-	json = plotly.io.to_json(plot)
-	return _jplot(json)
+	plt.close(figure)
+	return plotly.io.to_json(plot).encode()
+
+def png_bytes(figure):
+	"""Render a matplotlib figure to png bytes. The figure is closed afterwards."""
+	buffer = io.BytesIO()
+	figure.savefig(buffer, format="png")
+	plt.close(figure)
+	return buffer.getvalue()
+
+class PNG:
+	"""Displays already rendered png bytes."""
+	def __init__(self, data):
+		self.data = data
+
+	def _repr_png_(self):
+		return self.data
+
+# ╔═╡ 1c4ddac6-52b0-4377-92e4-18e219940caa
+_jlines = jl.seval("""begin
+	plotly_value(v) =
+		pyisinstance(v, pybuiltins.dict) ? Dict(pyconvert(String, k) => plotly_value(x) for (k, x) in v.items()) :
+		pyhasattr(v, "__array_interface__") ? PyArray(v) :
+		pyconvert(Any, v)
+	plotly_kwargs(d) = (Symbol(pyconvert(String, k)) => plotly_value(v) for (k, v) in Py(d).items())
+	(traces, layout) -> PlutoPlot(Plot([scatter(; plotly_kwargs(t)...) for t in Py(traces)], Layout(; plotly_kwargs(layout)...)))
+end""")
+# the size of a plot as sent to the browser, rather than its size in memory
+html_nbytes = jl.seval("""x -> sizeof(repr(MIME"text/html"(), x))""")
+def plot_lines(frames, names, xaxis, yaxis, binary=True, quantize=False):
+	"""Plotly line chart with one trace per frame.
+
+	The plot is built on julia side directly from the numpy columns, without going through matplotlib or json.
+
+	With `binary` the columns are handed over as base64 typed arrays, which plotly.js (>= 2.28) reads without parsing decimal text. Evenly spaced x values are sent as start and step only. `quantize` additionally stores float64 values as float32.
+	"""
+	encode = (lambda values, axis: typed_axis(values, axis, quantize)) if binary else (lambda values, axis: {axis: values})
+	traces = [
+		{"name": name, **encode(frame[xaxis].to_numpy(), "x"), **encode(frame[yaxis].to_numpy(), "y")}
+		for frame, name in zip(frames, names)
+	]
+	return _jlines(traces, plot_layout(xaxis, yaxis))
+
+def plot_columns(wide, xaxis, yaxis, quantize=False):
+	"""Plotly line chart with one trace per column of `wide`, all sharing its index as x values.
+
+	The values are transposed and encoded as typed arrays in one go, hence the cost hardly grows with the number of columns.
+	"""
+	values = wide.to_numpy().T
+	if quantize and values.dtype == np.float64:
+		values = values.astype(np.float32)
+	values = np.ascontiguousarray(values)
+	x = typed_axis(wide.index.to_numpy(), "x")
+	traces = [{"name": name, **x, "y": typed_array(row)} for name, row in zip(wide.columns, values)]
+	return _jlines(traces, plot_layout(xaxis, yaxis))
+
+def plot_layout(xaxis, yaxis):
+	return {
+		"xaxis": {"title": xaxis},
+		"yaxis": {"title": yaxis},
+		# enable responsive layout and reduce margins
+		"autosize": True,
+		"margin": {"l": 2, "r": 2, "t": 24, "b": 2},
+	}
+
+PLOTLY_DTYPES = {
+	"int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+	"int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8",
+}
+
+def typed_array(values, quantize=False):
+	"""Encode a numpy array as plotly.js typed array, i.e. little endian base64 `bdata` with its `dtype`."""
+	if quantize and values.dtype == np.float64:
+		values = values.astype(np.float32)
+	if values.dtype.kind in "iu" and values.dtype.itemsize == 8:
+		# plotly.js has no 64 bit integer arrays, years and counts fit into 32 bits
+		values = values.astype(np.int32 if values.dtype.kind == "i" else np.uint32)
+	values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+	return {"dtype": PLOTLY_DTYPES[values.dtype.name], "bdata": base64.b64encode(values.tobytes()).decode()}
+
+def typed_axis(values, axis, quantize=False):
+	"""Plotly trace attributes for the values of `axis`, delta encoded as `x0` and `dx` if evenly spaced."""
+	if len(values) > 1 and values.dtype.kind in "iu":
+		steps = np.diff(values)
+		if (steps == steps[0]).all():
+			return {f"{axis}0": values[0].item(), f"d{axis}": steps[0].item()}
+	return {axis: typed_array(values, quantize)}
+
+def benchmark(candidates, number=10):
+	"""Mean seconds per call for each of the given functions."""
+	return {name: timeit.timeit(f, number=number) / number for name, f in candidates.items()}
+
+# ╔═╡ 3c5a7e21-8d4b-4f6a-b0e9-71c2d8a5f463
+_julia_table = jl.seval("""begin
+	julia_column(c) = pyisinstance(c, pybuiltins.list) ? pyconvert(Vector{String}, c) : PyArray(c)
+	(names, columns) -> NamedTuple{Tuple(Symbol(pyconvert(String, n)) for n in names)}(Tuple(julia_column(c) for c in columns))
+end""")
+_julia_columns = jl.seval("t -> (collect(String, map(String, keys(t))), collect(Any, values(t)))")
+def julia_table(frame):
+	"""`frame` as julia NamedTuple of vectors, i.e. a column table in the sense of Tables.jl.
+
+	Numeric columns are handed over as `PyArray`, a julia view of the numpy buffer, so nothing is copied. Other columns, like the categorical countries, are converted to julia strings.
+
+	pyarrow is available, but handing over arrow tables via the Arrow C data interface would need Arrow.jl on the julia side, which is not part of the embedded julia environment. PythonCall's array views need no further package.
+	"""
+	columns = [
+		frame[c].to_numpy() if frame[c].dtype.kind in "biuf" else frame[c].astype(str).tolist()
+		for c in frame.columns
+	]
+	return _julia_table([str(c) for c in frame.columns], columns)
+
+def pandas_frame(table):
+	"""The reverse of `julia_table`: a pandas frame viewing the columns of a julia NamedTuple of vectors.
+
+	Columns of julia numbers are numpy views of the julia arrays, and `PyArray` columns their original numpy arrays, so again nothing is copied.
+	"""
+	names, columns = _julia_columns(table)
+	return pd.DataFrame({name: np.asarray(column) for name, column in zip(names, columns)}, copy=False)
+
+# ╔═╡ 2f7f7c64-3fd4-4b8e-a0c4-3c1e4a8a3a51
+class FigureCache:
+	"""LRU cache for rendered figures, bounded by the total size of the cached bytes.
+
+	`get(key, render)` only calls `render()` if `key` is not cached yet. The size of a value is measured by `nbytes`, which defaults to `len` for `bytes` values. Values larger than the whole cache are returned without caching them.
+	"""
+	def __init__(self, max_bytes):
+		self.max_bytes = max_bytes
+		self.entries = OrderedDict()
+		self.nbytes = 0
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key, render, nbytes=len):
+		if key in self.entries:
+			self.hits += 1
+			self.entries.move_to_end(key)
+			return self.entries[key][0]
+		self.misses += 1
+		value = render()
+		size = nbytes(value)
+		if size > self.max_bytes:
+			return value
+		self.entries[key] = (value, size)
+		self.nbytes += size
+		while self.nbytes > self.max_bytes:
+			_, (_, evicted) = self.entries.popitem(last=False)
+			self.nbytes -= evicted
+		return value
+
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {
+			"entries": len(self.entries),
+			"MB": self.nbytes / 2**20,
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hits / lookups if lookups else 0.0,
+		}
+
+# ╔═╡ 5d0e1a8e-6f0b-4c52-9a57-0d7f3b6e2c11
+figure_cache = FigureCache(max_bytes=32 * 2**20)
+
+# ╔═╡ 955a99de-11c1-4661-8296-bd2b249c79ae
+OWID_DTYPES = {"country": "category", "iso_code": "category", "year": "int16"}
+
+def read_compact(source, usecols, dtype=OWID_DTYPES):
+	"""Parse only `usecols` of a csv file, or buffer, in this order, using compact dtypes.
+
+	pyarrow's csv reader parses on several threads. Float columns are downcast to float32 wherever this is lossless. Columns without any value become float64 NaN, as pandas would parse them.
+	"""
+	options = pa_csv.ConvertOptions(include_columns=usecols, strings_can_be_null=True)
+	table = pa_csv.read_csv(source, convert_options=options)
+	table = table.cast(pa.schema([
+		pa.field(field.name, pa.float64()) if pa.types.is_null(field.type) else field for field in table.schema
+	]))
+	frame = table.to_pandas().astype({c: t for c, t in dtype.items() if c in usecols})
+	for column in frame.columns[frame.dtypes == "float64"]:
+		values = frame[column].to_numpy()
+		downcast = values.astype("float32")
+		if np.array_equal(downcast, values, equal_nan=True):
+			frame[column] = downcast
+	return frame
+
+class LazyColumns:
+	"""A csv file whose columns are parsed on first use.
+
+	`frame` starts with `usecols` only. `load` adds missing columns to it, hence memory grows with the columns actually looked at, not with the file.
+
+	With `sort_by` the rows are stably sorted once, and every column loaded later is put into the same order.
+
+	With `keys`, identifying the rows, a new version of the file can be applied with `update`, parsing only the rows which changed. `version` counts the updates and `delta` describes the latest one.
+
+	With `size` only the first `size` bytes of the file are used, e.g. of a file still being downloaded, and `extend` appends the rows of the bytes which arrived since. Every line is parsed once.
+
+	Once `attach`ed to a `SharedFeather` file with the same rows, columns are no longer parsed but mapped from it.
+	"""
+	def __init__(self, path, usecols, dtype=OWID_DTYPES, sort_by=None, keys=None, size=None):
+		self.path = path
+		self.dtype = dtype
+		self.sort_by = sort_by
+		self.keys = keys
+		self.size = size
+		self.shared = None
+		self.columns = list(pd.read_csv(path, nrows=0).columns)
+		self.version = 0
+		self.delta = None
+		frame = read_compact(self.source(), list(dict.fromkeys([*usecols, *(sort_by or []), *(keys or [])])), dtype)
+		order = self.sorted_rows(frame)
+		self.order = None if order is None or (order[1:] > order[:-1]).all() else order
+		if self.order is not None:
+			frame = frame.iloc[self.order].reset_index(drop=True)
+		self.frame = frame
+		if keys:
+			hashes = row_hashes(self.source())
+			self.hashes = hashes if self.order is None else hashes[self.order]
+
+	def source(self):
+		"""The csv file, or with `size` a buffer of its first `size` bytes."""
+		return self.path if self.size is None else csv_bytes(self.path, 0, self.size)
+
+	def sorted_rows(self, frame):
+		return frame.sort_values(self.sort_by, kind="stable").index.to_numpy() if self.sort_by else None
+
+	def read(self, columns):
+		"""Parse `columns` in the row order of `frame`, without adding them to it."""
+		if self.shared is not None:
+			return self.shared.read(columns)
+		extra = read_compact(self.source(), columns, self.dtype)
+		if self.order is not None:
+			extra = extra.iloc[self.order].reset_index(drop=True)
+		return extra
+
+	def extend(self, size):
+		"""Append the rows in the bytes from the previous `size` up to `size`, parsing only these. Returns the number of rows added.
+
+		The rows keep the order of `sort_by`, as if the first `size` bytes were parsed anew. `version` increases if rows were added.
+		"""
+		chunk = csv_bytes(self.path, self.size, size)
+		self.size = size
+		extra = read_compact(chunk, list(self.frame.columns), self.dtype)
+		if not len(extra):
+			return 0
+		start = len(self.frame)
+		# file positions of the rows, the new ones follow all others
+		positions = np.r_[np.arange(start) if self.order is None else self.order, start:start + len(extra)]
+		# an empty frame, parsed from the header only, would turn the dtypes of the new rows into object
+		frame = pd.concat([self.frame, extra] if start else [extra], ignore_index=True)
+		for column, dtype in self.frame.dtypes.items():
+			if isinstance(dtype, pd.CategoricalDtype):
+				# the categories of the chunks differ, keep them sorted as if parsed at once
+				frame[column] = frame[column].astype("category")
+		hashes = np.r_[self.hashes, row_hashes(chunk)] if self.keys else None
+		# a stable sort of the sorted rows followed by the new rows gives the same order as sorting all rows in file order
+		order = self.sorted_rows(frame)
+		if order is not None:
+			frame = frame.iloc[order].reset_index(drop=True)
+			positions = positions[order]
+			hashes = hashes[order] if self.keys else None
+		self.order = None if (positions[1:] > positions[:-1]).all() else positions
+		if self.keys:
+			self.hashes = hashes
+		self.frame = frame
+		self.version += 1
+		self.delta = None
+		return len(extra)
+
+	def load(self, *columns):
+		missing = [c for c in dict.fromkeys(columns) if c not in self.frame]
+		if missing:
+			extra = self.read(missing)
+			# a new frame instead of assigning columns, which would copy mapped columns into memory
+			self.frame = pd.DataFrame(dict(self.frame.items(), **{column: extra[column] for column in missing}), copy=False)
+		return self.frame
+
+	def matches(self, table):
+		"""Whether the arrow `table` has the columns of the csv file and the rows of `frame`, in the same order."""
+		if table.column_names != self.columns or table.num_rows != len(self.frame):
+			return False
+		keys = table.select(self.keys).to_pandas()
+		return all(np.array_equal(keys[key].astype(str).to_numpy(), self.frame[key].astype(str).to_numpy()) for key in self.keys)
+
+	def attach(self, shared):
+		"""Read further columns from the `SharedFeather` file `shared`, and switch the loaded float columns to it, too."""
+		self.shared = shared
+		floats = [column for column, dtype in self.frame.dtypes.items() if dtype.kind == "f"]
+		mapped = shared.read(floats)
+		self.frame = pd.DataFrame({column: mapped[column] if column in floats else values for column, values in self.frame.items()}, copy=False)
+
+	def update(self, path):
+		"""Switch to a new version of the file, parsing only rows which are new or changed.
+
+		Rows are matched by `keys` and compared by the hash of their csv line. Returns the `delta`: the number of changed, added and removed rows and the countries they belong to, i.e. the values of the first key. `version` only increases if any row changed.
+		"""
+		keys = read_compact(path, self.keys, self.dtype)
+		hashes = row_hashes(path)
+		order = self.sorted_rows(keys)
+		if order is None:
+			order = np.arange(len(keys))
+		keys = keys.iloc[order].reset_index(drop=True)
+		hashes = hashes[order]
+
+		old = pd.MultiIndex.from_arrays([self.frame[key].to_numpy() for key in self.keys])
+		position = old.get_indexer(pd.MultiIndex.from_arrays([keys[key].to_numpy() for key in self.keys]))
+		reuse = position >= 0
+		reuse[reuse] = self.hashes[position[reuse]] == hashes[reuse]
+		fresh = np.flatnonzero(~reuse)
+		removed = np.ones(len(self.frame), dtype=bool)
+		removed[position[position >= 0]] = False
+
+		self.path = path
+		self.columns = list(pd.read_csv(path, nrows=0).columns)
+		self.order = None if (order[1:] > order[:-1]).all() else order
+		self.hashes = hashes
+		self.delta = {
+			"changed": int((position[fresh] >= 0).sum()),
+			"added": int((position[fresh] < 0).sum()),
+			"removed": int(removed.sum()),
+			"countries": set(keys[self.keys[0]].iloc[fresh]) | set(self.frame[self.keys[0]][removed]),
+		}
+		if not fresh.size and not removed.any():
+			return self.delta
+		# the shared file still holds the previous rows
+		self.shared = None
+
+		# data lines of the fresh rows, counting the header as line 0
+		lines = order[fresh] + 1
+		extra = read_compact(csv_lines(path, lines), list(self.frame.columns), self.dtype)
+		extra.index = fresh[np.argsort(lines, kind="stable")]
+		kept = self.frame.iloc[position[reuse]]
+		kept.index = np.flatnonzero(reuse)
+		frame = pd.concat([kept, extra] if len(extra) else [kept]).sort_index().reset_index(drop=True)
+		for column, dtype in self.frame.dtypes.items():
+			if isinstance(dtype, pd.CategoricalDtype):
+				# categories of added and removed rows differ, keep them sorted and in use as if parsed anew
+				frame[column] = frame[column].astype("category").cat.remove_unused_categories()
+		self.frame = frame
+		self.version += 1
+		return self.delta
+
+def row_hashes(source):
+	"""Hash of every data line of a csv file, or buffer, in file order."""
+	if isinstance(source, io.BytesIO):
+		text = source.getvalue().decode("utf-8")
+	else:
+		with open(source, encoding="utf-8") as file:
+			text = file.read()
+	return pd.util.hash_array(np.array(text.splitlines()[1:], dtype=object))
+
+def csv_lines(path, lines):
+	"""Buffer of the header and the data `lines` of a csv file, in file order, counting the header as line 0."""
+	with open(path, "rb") as file:
+		content = file.read().splitlines()
+	return io.BytesIO(b"\n".join([content[0], *(content[i] for i in np.sort(lines))]) + b"\n")
+
+def csv_bytes(path, start, stop):
+	"""Bytes `start` to `stop` of a csv file as buffer, preceded by the header line unless `start` is 0."""
+	with open(path, "rb") as file:
+		header = file.readline() if start else b""
+		file.seek(start)
+		return io.BytesIO(header + file.read(stop - start))
+
+class ConditionalDownload:
+	"""Downloads `url` to a local file, again only if it changed since.
+
+	The `ETag` and `Last-Modified` headers of the last response are sent along, so an unchanged file costs a single request answered by `304 Not Modified`.
+
+	The first download is written to `path` directly, chunk by chunk, and `size` is the number of bytes of the complete lines written so far, so the file can be read while it arrives. Later downloads replace the file once complete.
+
+	Without `path`, the file is kept in a temporary directory which is removed together with the `ConditionalDownload`, or at the latest when the kernel exits.
+	"""
+	def __init__(self, url, path=None, chunk_size=2**20):
+		self.url = url
+		if path is None:
+			self.directory = tempfile.TemporaryDirectory(prefix="jolin-download-")
+			path = Path(self.directory.name) / url.rsplit("/", 1)[-1]
+		self.path = Path(path)
+		self.chunk_size = chunk_size
+		self.validators = {}
+		self.size = 0
+
+	def fetch(self):
+		"""Path of the downloaded file if it changed, otherwise `None`."""
+		headers = {
+			header: self.validators[name]
+			for name, header in [("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since")]
+			if name in self.validators
+		}
+		target = self.path.with_name(self.path.name + ".part") if self.path.exists() else self.path
+		try:
+			with urlopen(Request(self.url, headers=headers)) as response, open(target, "wb") as file:
+				size = 0
+				# `read1` returns what arrived so far, rather than waiting for a whole chunk
+				while chunk := response.read1(self.chunk_size):
+					file.write(chunk)
+					file.flush()
+					end = chunk.rfind(b"\n")
+					if target == self.path and end >= 0:
+						self.size = size + end + 1
+					size += len(chunk)
+				if target == self.path:
+					# the last line may lack a line break
+					self.size = size
+				self.validators = {name: response.headers[name] for name in ["ETag", "Last-Modified"] if response.headers[name]}
+		except HTTPError as error:
+			if error.code == 304:
+				return None
+			raise
+		target.replace(self.path)
+		return str(self.path)
+
+	def source(self):
+		"""What identifies the downloaded version of the file: the validators the server sent and the size."""
+		return {**self.validators, "size": self.path.stat().st_size}
+
+SHARED_DATA = Path(os.environ.get("JOLIN_SHARED_DATA", Path(tempfile.gettempdir()) / "jolin-shared-data"))
+# the same for every writer, R included: plain strings rather than dictionaries or factors, float64 for all other columns
+SHARED_TYPES = {"country": pa.string(), "iso_code": pa.string(), "year": pa.int32()}
+
+class SharedFeather:
+	"""A table in an uncompressed Feather file, which all notebook kernels on the host memory map.
+
+	The file is shared with the R dashboard. Instead of every kernel holding its own parsed copy of the data, the operating system keeps one copy in its page cache. Missing floats are stored as NaN rather than null, because columns without nulls are mapped without any copying, in pandas as in R.
+
+	All columns have the types of `SHARED_TYPES`, otherwise float64, whichever dashboard wrote the file. `write` replaces the file atomically, storing the `source` of the data, e.g. the `ConditionalDownload.source` of the csv file, in the schema metadata. The R dashboard stores none. A kernel keeps seeing the version it mapped with `open` until it opens the file again, even if another kernel replaced it meanwhile.
+	"""
+	def __init__(self, name, directory=SHARED_DATA, max_age=3600):
+		self.path = Path(directory) / f"{name}.arrow"
+		self.max_age = max_age
+		self.table = None
+
+	def fresh(self):
+		"""Whether the file exists and was written or confirmed within `max_age` seconds."""
+		try:
+			return time.time() - self.path.stat().st_mtime < self.max_age
+		except FileNotFoundError:
+			return False
+
+	def touch(self):
+		"""Mark the file as up to date."""
+		self.path.touch()
+
+	def open(self):
+		self.table = feather.read_table(self.path, memory_map=True)
+		return self.table
+
+	def source(self):
+		"""The `source` the opened table was written with, or `None`."""
+		metadata = self.table.schema.metadata or {}
+		return json.loads(metadata[b"source"]) if b"source" in metadata else None
+
+	def write(self, frame, source=None):
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		table = pa.table({column: shared_array(values, SHARED_TYPES.get(column, pa.float64())) for column, values in frame.items()})
+		if source is not None:
+			table = table.replace_schema_metadata({"source": json.dumps(source)})
+		fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".part")
+		os.close(fd)
+		feather.write_feather(table, tmp, compression="uncompressed")
+		os.replace(tmp, self.path)
+		return self.open()
+
+	def read(self, columns):
+		"""`columns` of the opened table as pandas frame. Numeric columns are views of the mapped file, strings become categories as in `OWID_DTYPES`."""
+		return self.table.select(columns).to_pandas(split_blocks=True, strings_to_categorical=True)
+
+def shared_array(values, arrow_type):
+	"""The pandas column `values` as arrow array of `arrow_type`, with NaN rather than null for missing floats."""
+	if pa.types.is_string(arrow_type):
+		return pa.array(values.astype(object), type=arrow_type, from_pandas=True)
+	return pa.array(values.to_numpy(arrow_type.to_pandas_dtype()))
+
+class LiveCSV:
+	"""`LazyColumns` of the csv file at `url`, kept up to date by calling `refresh`.
+
+	The first download runs in a background thread. Until it is complete `partial` is true, and `refresh` parses only the lines which arrived since its previous call and appends them. `complete` waits for the rest of the download, and `columns` only for the header.
+
+	`refresh` always returns the same `LazyColumns`. Its `version` only increases if rows were added or changed, not if the server answers that the file is unchanged.
+
+	With a `SharedFeather` file `shared`, the complete data is written to it, unless another kernel already did from the same version of the csv file, and its columns are read from there.
+	"""
+	def __init__(self, url, shared=None, **options):
+		self.download = ConditionalDownload(url)
+		self.shared = shared
+		self.options = options
+		self.data = None
+		self.partial = True
+		self.error = None
+		self.loading = threading.Thread(target=self._first_download, daemon=True)
+		self.loading.start()
+
+	def _first_download(self):
+		try:
+			self.download.fetch()
+		except Exception as error:
+			self.error = error
+
+	def refresh(self):
+		"""The rows loaded so far, or once complete the full file, updated with the changed rows if it changed since. Returns `LazyColumns`."""
+		if self.partial:
+			return self._append()
+		path = self.download.fetch()
+		if path is not None:
+			self.data.update(path)
+		if self.data.shared is None:
+			self.share()
+		elif self.shared is not None:
+			# confirm the shared file, so that the other dashboards do not rebuild it
+			self.shared.touch()
+		return self.data
+
+	def complete(self):
+		"""The `LazyColumns` of the complete file, waiting for the first download to finish."""
+		if self.partial:
+			self.loading.join()
+			self._append()
+		return self.data
+
+	def columns(self):
+		"""The columns of the file, as soon as its header arrived."""
+		self._wait_for_header()
+		return list(pd.read_csv(self.download.path, nrows=0).columns)
+
+	def _wait_for_header(self):
+		while self.loading.is_alive() and self.download.size == 0:
+			self.loading.join(0.05)
+		if self.error is not None:
+			raise self.error
+
+	def _append(self):
+		self._wait_for_header()
+		# whether the download is done has to be known before reading how far it got
+		done = not self.loading.is_alive()
+		if self.error is not None:
+			raise self.error
+		if self.data is None:
+			self.data = LazyColumns(str(self.download.path), size=self.download.size, **self.options)
+		else:
+			self.data.extend(self.download.size)
+		if done:
+			self.partial = False
+			# columns loaded later are parsed from the whole file
+			self.data.size = None
+			self.share()
+		return self.data
+
+	def share(self):
+		"""Map the columns of `data` from the shared file, after writing it if it is missing, stale, or was written from another version of the csv file or with other rows."""
+		if self.shared is None:
+			return
+		source = self.download.source()
+		try:
+			matches = self.shared.fresh() and self.data.matches(self.shared.open()) and self.shared.source() == source
+		except (OSError, pa.ArrowInvalid):
+			matches = False
+		if not matches:
+			self.shared.write(self.data.read(self.data.columns), source)
+		self.data.attach(self.shared)
+
+def country_rows(frame):
+	"""Map each country to the `slice` of its rows. The frame has to be sorted by country."""
+	codes = frame["country"].cat.codes.to_numpy()
+	starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+	stops = np.r_[starts[1:], len(codes)]
+	names = frame["country"].cat.categories[codes[starts]]
+	return {name: slice(start, stop) for name, start, stop in zip(names, starts, stops)}
+
+def country_year_rows(frame, rows, country, first_year, last_year):
+	"""The `slice` of the rows of `country` from `first_year` to `last_year`, both included.
+
+	The frame has to be sorted by country and year, and `rows` be its `country_rows`. Within the rows of the country the years are sorted, hence two binary searches find the range.
+	"""
+	span = rows.get(country, slice(0, 0))
+	years = frame["year"].to_numpy()[span]
+	start = span.start + years.searchsorted(first_year, side="left")
+	stop = span.start + years.searchsorted(last_year, side="right")
+	return slice(start, stop)
+
+# ╔═╡ 0a95cbef-285f-4578-8754-e4a7b97f7c6d
+co2_source = LiveCSV(
+	"https://nyc3.digitaloceanspaces.com/owid-public/data/co2/owid-co2-data.csv",
+	usecols=["country", "iso_code", "year"],
+	sort_by=["country", "year"],
+	keys=["country", "year"],
+	shared=SharedFeather("owid-co2-data"),
+)
+
+# ╔═╡ 889157a2-ea1e-4559-bc1a-3f6fa56e41d8
+owid = co2_source.refresh()
+# show newly arrived rows every second while loading, afterwards check for new data every full hour
+jl.repeat_at(jl.ceil(jl.now(), jl.Second(1) if co2_source.partial else jl.Hour(1)))
+
+# ╔═╡ 685f87b2-5aa5-4d47-855e-204c025449a4
+columns = co2_source.columns()
+
+# ╔═╡ a14c6e88-4370-42cb-9332-1562b3128027
+yaxis, ui3 = jl.viewof("yaxis", jl.Select(columns, default="co2_per_capita"))
+
+# ╔═╡ 4f5b8092-e8a3-4b29-9228-861d1d56bb09
+countries = list(dict.fromkeys(co2_source.complete().frame["country"]))  # simple unique
+
+# ╔═╡ 84fbf5bd-7805-4173-847a-af85d118ff2f
+country1, ui1 = jl.viewof("country1", jl.Select(countries, default="World"))
+
+# ╔═╡ 738bac24-243f-40f9-b920-dab17e8e418d
+country2, ui2 = jl.viewof("country2", jl.Select(countries, default="Germany"))
+
+# ╔═╡ 19d912e4-1618-4446-b1dd-e97c027d16dc
+regions, ui_regions = jl.viewof("regions", jl.MultiSelect(countries, default=["World", "China", "United States", "India", "Germany"]))
+ui_regions
+
+# ╔═╡ 5c19e7a2-0f4d-4b3e-a8d6-2e9b7f1c4a35
+all_years = co2_source.complete().frame["year"]
+year_range, ui4 = jl.viewof("year_range", jl.RangeSlider(
+	jl.range(int(all_years.min()), int(all_years.max())), show_value=True,
+))
+
+# ╔═╡ 7a4d2c96-8e31-4f5b-b0c7-d94e1a6f2b58
+first_year, last_year = min(year_range), max(year_range)
+
+# ╔═╡ dbba9ade-1f92-4db6-a4c4-d94a6e1322ab
+{"yaxis": yaxis, "country1": country1, "country2": country2, "years": (first_year, last_year)}
+
+# ╔═╡ f75cac0d-4126-4825-9bb5-067a1cbf3fbe
+choose = jl.MD(f"""
+| Parameter | Choose                |
+| --------- | :-------------------- |
+| region 1  | {jl.format_html(ui1)} |
+| region 2  | {jl.format_html(ui2)} |
+| compare   | {jl.format_html(ui3)} |
+| years     | {jl.format_html(ui4)} |
+""")
+
+# ╔═╡ 1a104371-0421-4a31-a2e6-7975126e315c
+choose
+
+# ╔═╡ 6f17f6e2-c2dc-417d-b861-a33557c1db25
+df = owid.load(xaxis, yaxis)
+
+# ╔═╡ 8ec85252-96b7-4266-8c7a-b272c2ec125a
+selection = (owid.version, country1, country2, yaxis, first_year, last_year)
+
+# ╔═╡ ae53e5c5-94df-4950-86bc-f442974e3cc6
+rows = country_rows(owid.frame)
+
+# ╔═╡ 8d46f7b1-ece0-4f2f-90dd-5f0bfe7573f4
+subdf1 = df.iloc[country_year_rows(owid.frame, rows, country1, first_year, last_year)];
+
+# ╔═╡ e0c84a5f-1b7d-4e92-b3a6-8d5f0c2e9b17
+pandas_frame(_decade_means(julia_table(pd.DataFrame({"year": subdf1["year"], "value": subdf1[yaxis]}, copy=False))))
+
+# ╔═╡ 237078db-8ecf-4094-b673-307119c61333
+subdf2 = df.iloc[country_year_rows(owid.frame, rows, country2, first_year, last_year)]
+
+# ╔═╡ c375fa35-cb06-443d-bbb4-8a0b969ec39d
+def draw_regions():
+	figure, ax = plt.subplots()
+	ax.plot(subdf1[xaxis], subdf1[yaxis], label=country1)
+	ax.plot(subdf2[xaxis], subdf2[yaxis], color="orange", label=country2)
+	ax.legend(loc="upper left")
+	ax.set_xlabel(xaxis)
+	ax.set_ylabel(yaxis)
+	return figure
+
+# ╔═╡ 3eae9e47-0744-4ff6-9b34-f66d6dce05bd
+figure = PNG(figure_cache.get(("png", *selection), lambda: png_bytes(draw_regions())))
+figure
 
 # ╔═╡ a263d93b-8821-40bf-ae81-731df60a047e
-output = jplot(figure)
+output = figure_cache.get(
+	("plotly", *selection),
+	lambda: plot_lines([subdf1, subdf2], [country1, country2], xaxis, yaxis),
+	nbytes=html_nbytes,
+)
 
 # ╔═╡ 3f2c691b-f7a2-477c-ba2e-844d2f43cc14
 output
 
+# ╔═╡ d90357e1-8b16-40f5-a55d-52f80aae51bf
+# depend on the outputs to refresh after every interaction
+figure, output
+figure_cache.stats()
+
+# ╔═╡ 7432c4bb-b5ba-4e2c-85bf-72ceef0fc938
+# the clicks on the benchmark button seen so far, and the last result
+benchmarked = {"clicks": 0, "result": None}
+
+# ╔═╡ 5fe5462e-4c75-4a25-87c7-285e081fe15f
+# this cell reruns on every change of the selection as well, but only a click measures again
+if run_benchmark > benchmarked["clicks"]:
+	benchmarked["clicks"] = run_benchmark
+	benchmarked["result"] = benchmark({
+		"jplot": lambda: jplot(draw_regions()),
+		"plot_lines": lambda: plot_lines([subdf1, subdf2], [country1, country2], xaxis, yaxis),
+	})
+benchmarked["result"]
+
+# ╔═╡ 02d70f00-9262-4721-bf81-88c25fb5b20d
+def summarize(frame, metrics):
+	"""Summary per metric and country: first and last year with data, first and latest value, min, max, compound annual growth rate and number of values.
+
+	Rows of a country have to be ordered by year.
+	"""
+	parts = {}
+	for metric in metrics:
+		valid = frame.loc[frame[metric].notna(), ["country", "year", metric]]
+		grouped = valid.groupby("country", observed=True)
+		part = pd.DataFrame({
+			"first_year": grouped["year"].first(),
+			"last_year": grouped["year"].last(),
+			"first": grouped[metric].first(),
+			"latest": grouped[metric].last(),
+			"min": grouped[metric].min(),
+			"max": grouped[metric].max(),
+			"count": grouped[metric].size(),
+		})
+		years = (part["last_year"] - part["first_year"]).astype("float64")
+		growth = part["latest"].astype("float64") / part["first"].astype("float64")
+		with np.errstate(divide="ignore", invalid="ignore"):
+			part["cagr"] = np.where((years > 0) & (growth > 0), growth ** (1 / years) - 1, np.nan)
+		parts[metric] = part
+	return pd.concat(parts, names=["metric", "country"])
+
+def summarize_columns(owid, metrics, countries=None, batch_size=16):
+	"""`summarize` all `metrics` of a `LazyColumns` file.
+
+	Only `batch_size` columns are parsed at a time, so the full table never has to be in memory. `countries` restricts the summary to these countries.
+	"""
+	keys = owid.frame[["country", "year"]]
+	rows = slice(None) if countries is None else keys["country"].isin(countries).to_numpy()
+	parts = []
+	for start in range(0, len(metrics), batch_size):
+		batch = owid.read(metrics[start:start + batch_size]).select_dtypes("number")
+		parts.append(summarize(pd.concat([keys, batch], axis=1)[rows], list(batch.columns)))
+	return pd.concat(parts).sort_index()
+
+def pivot_years(frame, metric):
+	"""Dense (year × country) matrix of `metric`, NaN where a country has no value."""
+	years = frame["year"].to_numpy()
+	first, last = years.min(), years.max()
+	values = frame[metric].to_numpy()
+	dtype = values.dtype if values.dtype.kind == "f" else np.float64
+	matrix = np.full((last - first + 1, len(frame["country"].cat.categories)), np.nan, dtype=dtype)
+	matrix[years.astype(np.intp) - first, frame["country"].cat.codes.to_numpy()] = values
+	return pd.DataFrame(
+		matrix,
+		index=pd.RangeIndex(first, last + 1, name="year"),
+		columns=frame["country"].cat.categories,
+	)
+
+def patch_years(wide, frame, metric, countries):
+	"""`pivot_years` of `frame`, reusing the matrix `wide` of a previous version for all but `countries`."""
+	years = frame["year"].to_numpy()
+	first, last = years.min(), years.max()
+	wide = wide.reindex(index=pd.RangeIndex(first, last + 1, name="year"), columns=frame["country"].cat.categories)
+	# a copy, as under copy-on-write the frame only hands out read-only views
+	matrix = wide.to_numpy(copy=True)
+	columns = wide.columns.get_indexer(list(countries))
+	matrix[:, columns[columns >= 0]] = np.nan
+	rows = frame["country"].isin(countries).to_numpy()
+	matrix[years[rows].astype(np.intp) - first, frame["country"].cat.codes.to_numpy()[rows]] = frame[metric].to_numpy()[rows]
+	return pd.DataFrame(matrix, index=wide.index, columns=wide.columns)
+
+def wide_matrix(owid, metric, cache):
+	"""`pivot_years` of `metric`, computed once per data version and kept in `cache`.
+
+	For a new version, the matrix of the previous version is patched for the changed countries only.
+	"""
+	key = (owid.version, metric)
+	if key not in cache:
+		previous = cache.pop((owid.version - 1, metric), None)
+		for stale in [k for k in cache if k[1] == metric]:
+			del cache[stale]
+		if previous is None or owid.delta is None:
+			cache[key] = pivot_years(owid.load(metric), metric)
+		else:
+			cache[key] = patch_years(previous, owid.load(metric), metric, owid.delta["countries"])
+	return cache[key]
+
+def trim_years(wide):
+	"""Drop leading and trailing years without any value."""
+	valid = wide.notna().any(axis=1)
+	return wide.loc[valid.idxmax():valid[::-1].idxmax()]
+
+def refresh_summary(summary, owid, countries):
+	"""Recompute the `summary` rows of the given countries, keeping all others."""
+	kept = summary[~summary.index.get_level_values("country").isin(countries)]
+	fresh = summarize_columns(owid, list(summary.index.unique("metric")), countries)
+	return pd.concat([kept, fresh] if len(fresh) else [kept]).sort_index()
+
+def current_summary(owid, metrics, cache):
+	"""`summarize_columns` of `metrics`, kept per data version in `cache`.
+
+	For a new version, only the summaries of the changed countries are recomputed.
+	"""
+	if owid.version not in cache:
+		previous = cache.pop(owid.version - 1, None)
+		cache.clear()
+		if previous is None or owid.delta is None:
+			cache[owid.version] = summarize_columns(owid, metrics)
+		else:
+			cache[owid.version] = refresh_summary(previous, owid, list(owid.delta["countries"]))
+	return cache[owid.version]
+
+# ╔═╡ 982bdbf4-8c83-4417-80ac-f25375cc4714
+# the matrix is built from the complete data only, not from every chunk while loading
+co2_source.complete()
+wide = trim_years(wide_matrix(owid, yaxis, wide_cache).loc[first_year:last_year].reindex(columns=list(regions)))
+
+# ╔═╡ ee4a1086-6d56-41cb-89e2-ddd97c7f6fcc
+comparison = plot_columns(wide, xaxis, yaxis)
+
+# ╔═╡ 7bea315e-6f2f-4b08-a04b-3affe9bed0b9
+comparison
+
+# ╔═╡ c49a354a-27ed-4ed1-b682-00dfc3cb4324
+# the summary is built from the complete data only, not from every chunk while loading
+co2_source.complete()
+summary = current_summary(owid, [c for c in columns if c not in OWID_DTYPES], summary_cache)
+
+# ╔═╡ 43af47a4-647e-4644-954e-85f0744d993b
+summary.loc[yaxis].nlargest(10, "cagr")
+
 # ╔═╡ a2dfe9ce-1bc8-4e1c-a04c-2d9f6f5937ed
 jl.MD("""
 # Resources
@@ -192,7 +1038,7 @@ Let's create the link for this notebook automatically
 """)
 
 # ╔═╡ 4353f888-3c5e-4a92-a285-70e11a6971ad
-import os, urllib
+import urllib
 
 # ╔═╡ 2c836550-583e-4a71-9378-133f5d66f889
 path = urllib.parse.quote(jl.PlutoRunner.notebook_path.x, safe="")
@@ -219,10 +1065,12 @@ PLUTO_CONDAPKG_TOML_CONTENTS = """
 channels = ["conda-forge", "file:///home/jolin_user/.julia/dev/JolinWorkspace/conda/channel"]
 
 [deps]
+numpy = "1.26.4"
 pandas = "2.2.2"
 pyjuliacall = "0.9.23"
 plotly = "5.24.1"
 matplotlib = "3.9.1"
+pyarrow = "16.1.0"
 """
 
 
@@ -230,6 +1078,7 @@ matplotlib = "3.9.1"
 PLUTO_PROJECT_TOML_CONTENTS = """
 [deps]
 CondaPkg = "992eb4ea-22a4-4c89-a5bb-47a3300528ab"
+Dates = "ade2ca70-3891-5945-98fb-dc099432e06a"
 JSON = "682c06a0-de6a-54ab-a142-c8b1cf79cde6"
 Jolin = "87100c7f-5f96-485a-944e-f6ba66ec4971"
 PythonCall = "6099a3de-0909-46bc-b1f4-468b9a2dfc0d"
@@ -248,7 +1097,7 @@ PLUTO_MANIFEST_TOML_CONTENTS = """
 
 julia_version = "1.10.5"
 manifest_format = "2.0"
-project_hash = "a9812d7b4b48cbefd63aecf52313f2bf5c73607b"
+project_hash = "eadfd37c68740ba89a4c1cd472a89468aab0d84b"
 
 [[deps.AbstractPlutoDingetjes]]
 deps = ["Pkg"]
@@ -915,25 +1764,57 @@ version = "17.4.0+2"
 # ╠═82a7c5b8-8244-4a95-bbf0-3b71b467964b
 # ╟─932405af-b989-4237-a868-aec893b43591
 # ╠═0a95cbef-285f-4578-8754-e4a7b97f7c6d
+# ╠═889157a2-ea1e-4559-bc1a-3f6fa56e41d8
 # ╠═685f87b2-5aa5-4d47-855e-204c025449a4
 # ╠═4f5b8092-e8a3-4b29-9228-861d1d56bb09
 # ╟─ee3c7f4b-6c2a-4e9e-be93-7fe2cf2602ee
 # ╟─a92d4a44-535b-4f08-bf9e-c93d24dfe9c4
 # ╠═84fbf5bd-7805-4173-847a-af85d118ff2f
 # ╠═738bac24-243f-40f9-b920-dab17e8e418d
+# ╠═5c19e7a2-0f4d-4b3e-a8d6-2e9b7f1c4a35
+# ╠═7a4d2c96-8e31-4f5b-b0c7-d94e1a6f2b58
 # ╠═a14c6e88-4370-42cb-9332-1562b3128027
 # ╠═f75cac0d-4126-4825-9bb5-067a1cbf3fbe
 # ╠═dbba9ade-1f92-4db6-a4c4-d94a6e1322ab
 # ╠═27944397-48c4-4066-80e3-3ff0c6da3579
+# ╠═6f17f6e2-c2dc-417d-b861-a33557c1db25
+# ╟─a52c930b-016f-4a0d-a417-c901ecf48134
+# ╠═ae53e5c5-94df-4950-86bc-f442974e3cc6
 # ╠═8d46f7b1-ece0-4f2f-90dd-5f0bfe7573f4
 # ╠═237078db-8ecf-4094-b673-307119c61333
 # ╟─3c2b7a4f-9a1a-46b8-9f82-43b84ca4fe5c
 # ╠═c375fa35-cb06-443d-bbb4-8a0b969ec39d
+# ╟─ed8e2bc3-8268-472f-bb40-cd027135e248
+# ╠═8ec85252-96b7-4266-8c7a-b272c2ec125a
+# ╠═3eae9e47-0744-4ff6-9b34-f66d6dce05bd
 # ╟─729824d2-3c9f-4189-92d7-3e884f882652
 # ╠═a263d93b-8821-40bf-ae81-731df60a047e
+# ╠═d90357e1-8b16-40f5-a55d-52f80aae51bf
+# ╠═c1c1b281-e220-4606-938a-37a91f18f538
+# ╠═7432c4bb-b5ba-4e2c-85bf-72ceef0fc938
+# ╠═5fe5462e-4c75-4a25-87c7-285e081fe15f
+# ╟─9e41d7b3-52a6-4c08-8f1d-a6b3e0c7d295
+# ╠═b7d2f0a4-6e19-4c3b-9a85-2f4c1e8d7a06
+# ╠═e0c84a5f-1b7d-4e92-b3a6-8d5f0c2e9b17
+# ╟─26687994-c3b0-45b6-93a9-5620b91217ea
+# ╠═19d912e4-1618-4446-b1dd-e97c027d16dc
+# ╠═d1ff3f26-abf9-4448-a9fa-e0747301e32c
+# ╠═982bdbf4-8c83-4417-80ac-f25375cc4714
+# ╠═ee4a1086-6d56-41cb-89e2-ddd97c7f6fcc
+# ╟─7bea315e-6f2f-4b08-a04b-3affe9bed0b9
+# ╟─dde6f012-45ca-4767-a157-57053a3ac999
+# ╠═6b0e9d3c-2f4a-4d51-9c0e-5a7d2e8f1b43
+# ╠═c49a354a-27ed-4ed1-b682-00dfc3cb4324
+# ╠═43af47a4-647e-4644-954e-85f0744d993b
 # ╟─62622307-2f20-408a-a60b-86a035626bce
 # ╠═e96dd32f-6bbe-469b-a23f-e80dfce9c149
 # ╠═47ca42ad-caef-472b-b024-68f8a3fa103b
+# ╠═1c4ddac6-52b0-4377-92e4-18e219940caa
+# ╠═3c5a7e21-8d4b-4f6a-b0e9-71c2d8a5f463
+# ╠═2f7f7c64-3fd4-4b8e-a0c4-3c1e4a8a3a51
+# ╠═5d0e1a8e-6f0b-4c52-9a57-0d7f3b6e2c11
+# ╠═955a99de-11c1-4661-8296-bd2b249c79ae
+# ╠═02d70f00-9262-4721-bf81-88c25fb5b20d
 # ╟─a2dfe9ce-1bc8-4e1c-a04c-2d9f6f5937ed
 # ╟─0269d4a5-5dfe-450f-8503-e6dbcc3f3456
 # ╟─5ae9e8bd-8bb2-40c5-91df-540ce6a4379f
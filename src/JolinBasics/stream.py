@@ -39,6 +39,8 @@ import threading
 import time
 import random
 import math
+import sys
+import types
 from collections import deque
 from matplotlib import pyplot as plt
 
@@ -150,8 +152,61 @@ jl.MD("""
 ## Plotting
 
 Finally we build or graph.
+
+Every update reruns the plotting cell. Creating a new figure each time would register it with pyplot, which keeps all figures alive until they are closed. Hence `cell_figures` closes the figures of the previous run of a cell as soon as the cell creates new ones, so plain `plt.subplots()` is fine in every cell.
 """)
 
+# ╔═╡ 3e7c9a51-b2d4-4f08-9c6e-8a1f5d2e7b94
+class CellFigures:
+	"""Closes the matplotlib figures a cell created in its previous run, once it runs again.
+
+	Registered as pyplot figure hook, it sees every figure created by `plt.figure`, `plt.subplots` and alike, so cells need no helper to avoid piling up figures. A new run of a cell is told apart from further figures of the same run by the frame of the cell, the outermost frame running code of this notebook. `live` counts the figures pyplot holds, which should stay constant in a long running notebook.
+	"""
+	def __init__(self, name="jolin_cell_figures"):
+		self.runs = {}
+		# matplotlib imports figure hooks by name
+		sys.modules[name] = types.SimpleNamespace(created=self.created)
+		hook = f"{name}:created"
+		if hook not in plt.rcParams["figure.hooks"]:
+			plt.rcParams["figure.hooks"] = [*plt.rcParams["figure.hooks"], hook]
+
+	def created(self, figure):
+		# julia is only called from the thread running the cells
+		if threading.current_thread() is not threading.main_thread():
+			return
+		cell_id = str(jl.PlutoRunner.currently_running_cell_id.x)
+		frame = self.cell_frame()
+		run, figures = self.runs.get(cell_id, (None, []))
+		if run is not frame:
+			for previous in figures:
+				plt.close(previous)
+			figures = []
+		figures.append(figure)
+		# keeps the frame alive, so a later run cannot get the same frame
+		self.runs[cell_id] = (frame, figures)
+
+	@staticmethod
+	def cell_frame():
+		frame, found = sys._getframe(), None
+		while frame is not None:
+			if frame.f_globals is globals():
+				found = frame
+			frame = frame.f_back
+		return found
+
+	def close(self):
+		"""Close all figures of all cells."""
+		for _, figures in self.runs.values():
+			for figure in figures:
+				plt.close(figure)
+		self.runs.clear()
+
+	@staticmethod
+	def live():
+		return len(plt.get_fignums())
+
+cell_figures = CellFigures()
+
 # ╔═╡ 546e2f0c-716f-4214-98b5-486c6e0b7e49
 # depend on update to auto trigger this cells
 update
@@ -166,11 +221,12 @@ figure
 jl.MD("""
 # Memory tracking
 
-For long running notebooks, it is important to make sure that no memory leaks appear.
+For long running notebooks, it is important to make sure that no memory leaks appear. Next to the memory used, we track the number of live matplotlib figures, which stays constant thanks to `cell_figures`.
 """)
 
 # ╔═╡ d4804e3f-9012-4f9d-afc3-1fed05edfedf
 memory_tracking = deque([], 400)
+live_figures = deque([], 400)
 
 # ╔═╡ a9b0d68b-f674-49a8-af05-9a8593bee9c7
 jl.MD("""
@@ -191,10 +247,14 @@ jl.repeat_at(next_time_rounded_by_X_seconds(10))
 # run Garbage Collector (it is recommended to run both versions)
 jl.GC.gc(True); jl.GC.gc(False)  
 memory_tracking.append(jl.Base.gc_live_bytes() / 2**20)
+live_figures.append(cell_figures.live())
 
 figure2, ax2 = plt.subplots()
 ax2.plot(memory_tracking)
 ax2.set_ylabel("MB")
+ax3 = ax2.twinx()
+ax3.plot(live_figures, color="tab:orange")
+ax3.set_ylabel("live figures")
 figure2
 
 # ╔═╡ 00000000-0000-0000-0000-000000000000
@@ -904,6 +964,7 @@ version = "17.4.0+2"
 # ╟─5855ac2e-e441-4b87-ab05-223d51689554
 # ╠═8238ddde-5b75-4b86-9dfe-9e1b2264227d
 # ╟─8356150c-00cd-48a9-b0e9-4e388b8b6899
+# ╠═3e7c9a51-b2d4-4f08-9c6e-8a1f5d2e7b94
 # ╠═546e2f0c-716f-4214-98b5-486c6e0b7e49
 # ╟─e41882d2-22ef-4631-8d90-7e2b9b8dd3c5
 # ╠═d4804e3f-9012-4f9d-afc3-1fed05edfedf
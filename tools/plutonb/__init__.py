@@ -0,0 +1,5 @@
+"""Tooling for the Pluto notebooks of this collection.
+
+Run the modules from the `tools` directory, e.g. `python -m plutonb.bondcache --help`.
+Only the Python standard library is needed.
+"""
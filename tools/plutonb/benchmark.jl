@@ -0,0 +1,78 @@
+# Headless run of one notebook for `python -m plutonb.benchmark`.
+#
+#     julia --project=<project with Pluto> benchmark.jl spec.toml
+#
+# The spec, written by `plutonb.benchmark.driver_spec`, names the notebook, the
+# cells to time and the widget values to step through. The measurements are
+# written as TOML to the `result` path of the spec.
+
+import Pluto
+import TOML
+
+const spec = TOML.parsefile(ARGS[1])
+
+seconds(cell) = cell.runtime === nothing ? 0.0 : cell.runtime / 1e9
+
+session = Pluto.ServerSession()
+session.options.server.disable_writing_notebook_files = true
+
+opened = time()
+notebook = Pluto.SessionActions.open(session, spec["notebook"]; run_async=false)
+result = Dict{String,Any}(
+    "cold_start_seconds" => time() - spec["spawned"],
+    "open_seconds" => time() - opened,
+    "errored_cells" => [string(cell.cell_id) for cell in notebook.cells if cell.errored],
+)
+cells = Dict(string(cell.cell_id) => cell for cell in notebook.cells)
+
+if haskey(spec, "data_ready_file")
+    # loaded in the background: from the start of the cell starting the download until the data is complete
+    start_cell = cells[spec["data_start_cell"]]
+    started = start_cell.output.last_run_timestamp - seconds(start_cell)
+    while !isfile(spec["data_ready_file"]) && time() - opened < spec["timeout"] / 2
+        sleep(0.05)
+    end
+    if isfile(spec["data_ready_file"])
+        ready = mtime(spec["data_ready_file"])
+        result["data_load_seconds"] = ready - started
+        # interactions are measured on the complete data, once the run which completed it is done
+        data_cell = cells[spec["data_cell"]]
+        while data_cell.queued || data_cell.running || data_cell.output.last_run_timestamp < ready
+            sleep(0.05)
+        end
+    end
+elseif haskey(spec, "data_cell")
+    result["data_load_seconds"] = seconds(cells[spec["data_cell"]])
+end
+
+# widget change to output: setting the value returns once all dependent cells ran
+interactions = Dict{String,Any}()
+for (name, values) in get(spec, "bonds", Dict())
+    times = Float64[]
+    for _ in 1:spec["repeat"], value in values
+        notebook.bonds[Symbol(name)] = Dict("value" => value)
+        start = time()
+        Pluto.set_bond_values_reactive(; session, notebook, bound_sym_names=[Symbol(name)], run_async=false)
+        push!(times, time() - start)
+    end
+    interactions[name] = times
+end
+result["interaction_seconds"] = interactions
+
+if haskey(spec, "stream_cell")
+    cell = cells[spec["stream_cell"]]
+    runs = 0
+    last_run = cell.output.last_run_timestamp
+    start = time()
+    while time() - start < spec["stream_seconds"]
+        sleep(0.005)
+        if cell.output.last_run_timestamp != last_run
+            runs += 1
+            last_run = cell.output.last_run_timestamp
+        end
+    end
+    result["stream_updates_per_second"] = runs / (time() - start)
+end
+
+Pluto.SessionActions.shutdown(session, notebook; async=false)
+open(io -> TOML.print(io, result), spec["result"], "w")
@@ -0,0 +1,310 @@
+"""Benchmark the Python, R and julia flavours of the JolinBasics notebooks side by side.
+
+Every notebook runs headless in a julia process of its own, opened by Pluto via
+`benchmark.jl`. Instead of the live data, the notebooks read fixed local
+fixtures: urls with a fixture are replaced by a local http server in a copy of
+the notebook. Measured are
+
+- cold start: from starting julia until all cells ran,
+- data load: run time of the cell defining the data, or until the data is complete where it loads in the background,
+- interaction latency: from setting a widget value until all cells depending on it ran,
+- streaming throughput: runs per second of the cell receiving the stream,
+- peak RSS of the largest process of the run, julia or the notebook worker.
+
+The results are JSON with sorted keys, one record per notebook file, so that
+runs of different releases can be diffed. With `--baseline`, the results of an
+earlier run, measurements worse by more than `--tolerance` are listed and the
+exit status is 1.
+
+    python -m plutonb.benchmark ../src/JolinBasics --project ~/.julia/environments/jolin --output benchmark.json
+
+`--project` has to provide the Pluto which runs all three languages, as on the
+Jolin notebook servers.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tomllib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from .notebook import LANGUAGES, Notebook
+
+SCHEMA = 1
+DRIVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark.jl")
+OWID_URL = "https://nyc3.digitaloceanspaces.com/owid-public/data/co2/owid-co2-data.csv"
+
+# What to measure per notebook: the variable defined by the cell loading the
+# data or receiving the stream, per file extension, and the widget values to
+# step through. Values are given as the browser sends them, PlutoUI sends the
+# position of the chosen option.
+SCENARIOS = {
+    "dashboard": {
+        "data": {".py": "owid", ".R": "mydf", ".jl": "data"},
+        # the Python dashboard downloads in a background thread started by `co2_source`, and
+        # shows partial data meanwhile; its data is complete once written to the shared file
+        "data_start": {".py": "co2_source"},
+        "data_ready": {".py": "owid-co2-data.arrow"},
+        "bonds": {"country1": ["puiselect-2", "puiselect-1"], "yaxis": ["puiselect-3", "puiselect-4"]},
+    },
+    "stream": {
+        "stream": {".py": "update", ".R": "myupdate", ".jl": "update"},
+        "bonds": {"shift": [5, 3], "variance": [3, 1]},
+    },
+}
+
+OWID_METRICS = [
+    "co2", "co2_per_capita", "co2_growth_prct", "coal_co2", "oil_co2", "gas_co2", "cement_co2",
+    "flaring_co2", "methane", "nitrous_oxide", "total_ghg", "population", "gdp",
+    "primary_energy_consumption", "energy_per_capita", "share_global_co2", "cumulative_co2",
+    "temperature_change_from_co2",
+]
+
+
+def owid_fixture(path, countries=250, first_year=1750, last_year=2022, metrics=60, seed=0):
+    """A csv file shaped like the OWID co2 data, the same for the same arguments."""
+    rng = random.Random(seed)
+    names = ["China", "Germany", "India", "World", *(f"Country {i:03d}" for i in range(countries - 4))]
+    columns = [*OWID_METRICS, *(f"metric_{i:02d}" for i in range(metrics - len(OWID_METRICS)))][:metrics]
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["country", "year", "iso_code", *columns])
+        for i, name in enumerate(sorted(names)):
+            scale = rng.lognormvariate(0, 2)
+            for year in range(first_year, last_year + 1):
+                # early years are mostly missing, as in the real data
+                present = 0.1 if year < 1850 else 0.9
+                writer.writerow([
+                    name, year, f"C{i:02X}",
+                    *(f"{scale * rng.random():.4g}" if rng.random() < present else "" for _ in columns),
+                ])
+
+
+FIXTURES = {OWID_URL: owid_fixture}
+
+
+def find_cell(notebook, name):
+    """Id of the cell assigning `name`, in any of the notebook languages, or `None`."""
+    pattern = re.compile(rf"^{re.escape(name)}\s*(?:=|<-)", re.M)
+    return next((cell_id for cell_id, code in notebook.cells.items() if pattern.search(code)), None)
+
+
+def driver_spec(path, notebook, scenario, result, repeat=5, stream_seconds=30.0, shared=None, timeout=1800):
+    """Settings for `benchmark.jl`, as TOML, which julia reads without extra packages.
+
+    `shared` is the directory of the data shared between dashboards, in which `data_ready` files appear.
+    """
+    extension = os.path.splitext(path)[1]
+    spec = {
+        "notebook": path, "result": result, "repeat": repeat, "stream_seconds": stream_seconds, "timeout": timeout,
+        "spawned": time.time(),
+    }
+    for kind in ["data", "data_start", "stream"]:
+        if extension in scenario.get(kind, {}):
+            cell_id = find_cell(notebook, scenario[kind][extension])
+            if cell_id is not None:
+                spec[f"{kind}_cell"] = cell_id
+    if shared and "data_cell" in spec and "data_start_cell" in spec and extension in scenario.get("data_ready", {}):
+        spec["data_ready_file"] = os.path.join(shared, scenario["data_ready"][extension])
+    lines = [f"{key} = {json.dumps(value)}" for key, value in spec.items()]
+    lines.append("[bonds]")
+    lines += [f"{name} = {json.dumps(values)}" for name, values in scenario.get("bonds", {}).items()]
+    return "\n".join(lines) + "\n"
+
+
+def serve(directory):
+    """Serve `directory` on a local port in a background thread. Returns the server."""
+    handler = partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_notebook(path, scenario, fixtures, work, julia="julia", project=None, repeat=5, stream_seconds=30.0, timeout=1800):
+    """Benchmark one notebook file. `fixtures` maps urls to local urls serving the fixture."""
+    name = os.path.basename(path)
+    directory = tempfile.mkdtemp(prefix=f"{name}-", dir=work)
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    for url, local in fixtures.items():
+        text = text.replace(url, local)
+    copy = os.path.join(directory, name)
+    with open(copy, "w", encoding="utf-8") as file:
+        file.write(text)
+    notebook = Notebook.read(copy)
+    result_path = os.path.join(directory, "result.toml")
+    spec_path = os.path.join(directory, "spec.toml")
+    # data shared between kernels, see the dashboards, must not leak from one run into the next
+    shared = os.path.join(directory, "shared")
+    with open(spec_path, "w", encoding="utf-8") as file:
+        file.write(driver_spec(copy, notebook, scenario, result_path, repeat, stream_seconds, shared, timeout))
+
+    command = [julia, "--startup-file=no"]
+    if project:
+        command.append(f"--project={project}")
+    env = {**os.environ, "JOLIN_SHARED_DATA": shared}
+    with open(os.path.join(directory, "log.txt"), "w+", encoding="utf-8") as log:
+        process = subprocess.Popen([*command, DRIVER, spec_path], stdout=log, stderr=subprocess.STDOUT, env=env)
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            # unlike `process.wait`, `wait4` returns the resource usage of this process tree alone
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        log.seek(0)
+        output = log.read()
+
+    record = {"file": name, "language": LANGUAGES[os.path.splitext(name)[1]], "notebook": os.path.splitext(name)[0]}
+    if process.returncode != 0 or not os.path.exists(result_path):
+        return {**record, "status": "failed", "error": output[-2000:]}
+    with open(result_path, "rb") as file:
+        measured = tomllib.load(file)
+    record.update({
+        "status": "ok",
+        "cold_start_seconds": round(measured["cold_start_seconds"], 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "errored_cells": sorted(measured.get("errored_cells", [])),
+        "interaction_ms": {
+            bond: {
+                "median": round(statistics.median(seconds) * 1000, 1),
+                "max": round(max(seconds) * 1000, 1),
+                "runs": len(seconds),
+            }
+            for bond, seconds in sorted(measured.get("interaction_seconds", {}).items()) if seconds
+        },
+    })
+    if "data_load_seconds" in measured:
+        record["data_load_seconds"] = round(measured["data_load_seconds"], 3)
+    if "stream_updates_per_second" in measured:
+        record["stream_updates_per_second"] = round(measured["stream_updates_per_second"], 2)
+    return record
+
+
+def benchmark(paths, julia="julia", project=None, repeat=5, stream_seconds=30.0, timeout=1800):
+    """Benchmark the notebook files `paths`, one after another. Returns the results document."""
+    work = tempfile.mkdtemp(prefix="plutonb-benchmark-")
+    try:
+        fixtures = os.path.join(work, "fixtures")
+        os.makedirs(fixtures)
+        server = serve(fixtures)
+        local = {}
+        for url, write in FIXTURES.items():
+            filename = url.rsplit("/", 1)[-1]
+            write(os.path.join(fixtures, filename))
+            local[url] = f"http://127.0.0.1:{server.server_port}/{filename}"
+        results = []
+        for path in sorted(paths, key=lambda path: os.path.basename(path)):
+            scenario = SCENARIOS[os.path.splitext(os.path.basename(path))[0]]
+            results.append(run_notebook(path, scenario, local, work, julia, project, repeat, stream_seconds, timeout))
+        server.shutdown()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return {"schema": SCHEMA, "repeat": repeat, "stream_seconds": stream_seconds, "results": results}
+
+
+def measurements(record):
+    """The measurements of a result record by name, and whether larger values are better."""
+    found = {
+        name: (record[name], False)
+        for name in ["cold_start_seconds", "data_load_seconds", "peak_rss_mb"] if name in record
+    }
+    for bond, latency in record.get("interaction_ms", {}).items():
+        found[f"interaction_ms.{bond}"] = (latency["median"], False)
+    if "stream_updates_per_second" in record:
+        found["stream_updates_per_second"] = (record["stream_updates_per_second"], True)
+    return found
+
+
+def regressions(document, baseline, tolerance=0.1):
+    """Measurements worse than in `baseline` by more than the fraction `tolerance`."""
+    before = {record["file"]: record for record in baseline["results"] if record["status"] == "ok"}
+    found = []
+    for record in document["results"]:
+        if record["status"] != "ok" or record["file"] not in before:
+            continue
+        previous = measurements(before[record["file"]])
+        for name, (value, larger_is_better) in measurements(record).items():
+            if name not in previous or not previous[name][0]:
+                continue
+            old = previous[name][0]
+            if larger_is_better:
+                worse = old / value if value else float("inf")
+            else:
+                worse = value / old
+            if worse > 1 + tolerance:
+                found.append({"file": record["file"], "measurement": name, "before": previous[name][0], "after": value})
+    return found
+
+
+def table(document):
+    """The measurements as text table, one column per notebook file."""
+    records = [record for record in document["results"] if record["status"] == "ok"]
+    rows = sorted({name for record in records for name in measurements(record)})
+    columns = [record["file"] for record in records]
+    values = [measurements(record) for record in records]
+    width = max([len(row) for row in rows] + [0])
+    lines = [" " * width + "".join(f"{column:>16}" for column in columns)]
+    for row in rows:
+        lines.append(row.ljust(width) + "".join(f"{value[row][0] if row in value else '-':>16}" for value in values))
+    lines += [f"{record['file']}: failed" for record in document["results"] if record["status"] != "ok"]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.benchmark", description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="notebook files or directories, e.g. ../src/JolinBasics")
+    parser.add_argument("--julia", default="julia", help="julia executable")
+    parser.add_argument("--project", help="julia project providing Pluto")
+    parser.add_argument("--repeat", type=int, default=5, help="times to step through the widget values")
+    parser.add_argument("--stream-seconds", type=float, default=30.0, help="time to count stream updates")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds after which a notebook run is killed")
+    parser.add_argument("--output", help="file for the JSON results, by default stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="fraction by which results may be worse")
+    args = parser.parse_args(argv)
+    paths = []
+    for path in args.paths:
+        candidates = [os.path.join(path, name) for name in os.listdir(path)] if os.path.isdir(path) else [path]
+        paths += [
+            candidate for candidate in candidates
+            if os.path.splitext(os.path.basename(candidate))[0] in SCENARIOS and os.path.splitext(candidate)[1] in LANGUAGES
+        ]
+    document = benchmark(paths, args.julia, args.project, args.repeat, args.stream_seconds, args.timeout)
+    text = json.dumps(document, indent=1, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    print(table(document), file=sys.stderr)
+    failed = any(record["status"] != "ok" for record in document["results"])
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            found = regressions(document, json.load(file), args.tolerance)
+        for regression in found:
+            print(f"regression: {json.dumps(regression)}", file=sys.stderr)
+        failed = failed or bool(found)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
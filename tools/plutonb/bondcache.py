@@ -0,0 +1,195 @@
+"""Content addressed cache of widget interactions, for static exports.
+
+A PlutoSliderServer answers widget interactions under
+`staterequest/<notebook hash>/<encoded bonds>`. `BondCache` stores these
+responses under the very same paths in a plain directory, so that any static
+file host can answer interactions which were seen or precomputed before,
+without a running Python or Julia process.
+
+Responses are stored once per content in `objects/` and only linked from
+their request paths, hence identical outputs share storage.
+
+    python -m plutonb.bondcache serve --upstream http://localhost:2345 --cache build
+    python -m plutonb.bondcache precompute ../src/JolinBasics/stream.py --upstream http://localhost:2345 --cache build
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from .msgpack import packb
+from .notebook import bonds, write_atomic
+
+CACHED_PREFIXES = ("staterequest/", "bondconnections/")
+
+
+class BondCache:
+    """Responses stored under their request path, content addressed in `objects/`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, request_path):
+        path = os.path.normpath(os.path.join(self.directory, request_path.lstrip("/")))
+        if os.path.commonpath([path, os.path.abspath(self.directory)]) != os.path.abspath(self.directory):
+            raise ValueError(f"request path outside of the cache: {request_path}")
+        return path
+
+    def get(self, request_path):
+        """The cached response, or `None`."""
+        try:
+            with open(self.path(request_path), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, request_path, data):
+        """Store `data` for `request_path` and return its content hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        target = os.path.join(self.directory, "objects", digest[:2], digest)
+        if not os.path.exists(target):
+            write_atomic(target, data)
+        link = self.path(request_path)
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        _link(target, link)
+        return digest
+
+    def get_or_fetch(self, request_path, fetch):
+        """The cached response, calling `fetch()` on the first request only."""
+        data = self.get(request_path)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        data = fetch()
+        self.put(request_path, data)
+        return data
+
+
+def _link(target, link):
+    """Relative symlink, falling back to a hardlink or copy where symlinks are not supported."""
+    tmp = f"{link}.tmp{os.getpid()}"
+    try:
+        os.symlink(os.path.relpath(target, os.path.dirname(link)), tmp)
+    except OSError:
+        try:
+            os.link(target, tmp)
+        except OSError:
+            shutil.copyfile(target, tmp)
+    os.replace(tmp, link)
+
+
+def base64url(data):
+    """Pluto's base64url, used for both parts of state request urls: `+` and `/` replaced, `=` padding kept."""
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def notebook_hash(path):
+    """Pluto's hash of a notebook file: base64url of its sha256."""
+    with open(path, "rb") as file:
+        return base64url(hashlib.sha256(file.read()).digest())
+
+
+def encode_bonds(values):
+    """Encode bond values the way the Pluto frontend puts them into state request urls."""
+    return base64url(packb({name: {"value": value} for name, value in sorted(values.items())}))
+
+
+def combinations(path, max_combinations):
+    """All combinations of bond values of a notebook whose widgets have a known, finite domain.
+
+    Raises `ValueError` if there are more than `max_combinations`.
+    """
+    domains = {bond.name: bond.possible_values() for bond in bonds(path)}
+    domains = {name: values for name, values in domains.items() if values is not None}
+    total = 1
+    for values in domains.values():
+        total *= len(values)
+    if total > max_combinations:
+        raise ValueError(f"{path} has {total} bond combinations, more than {max_combinations}")
+    names = sorted(domains)
+    for values in itertools.product(*(domains[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def fetch_upstream(upstream, request_path):
+    def fetch():
+        with urllib.request.urlopen(f"{upstream.rstrip('/')}/{request_path.lstrip('/')}") as response:
+            return response.read()
+    return fetch
+
+
+def precompute(cache, upstream, path, hash=None, max_combinations=1000):
+    """Make sure `cache` holds the response for every bond combination of the notebook at `path`."""
+    hash = hash or notebook_hash(path)
+    count = 0
+    for values in combinations(path, max_combinations):
+        request_path = f"staterequest/{hash}/{encode_bonds(values)}"
+        cache.get_or_fetch(request_path, fetch_upstream(upstream, request_path))
+        count += 1
+    return count
+
+
+def serve(cache, upstream, port):
+    """Serve the cache directory, answering uncached interactions from `upstream` on first request."""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=cache.directory, **kwargs)
+
+        def do_GET(self):
+            # clients may or may not escape the `=` padding as `%3D`, both map to one file
+            request_path = urllib.parse.unquote(self.path.split("?")[0]).lstrip("/")
+            if not request_path.startswith(CACHED_PREFIXES):
+                return super().do_GET()
+            try:
+                data = cache.get_or_fetch(request_path, fetch_upstream(upstream, request_path))
+            except urllib.error.HTTPError as error:
+                return self.send_error(error.code)
+            except ValueError:
+                return self.send_error(404)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/msgpack")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    with ThreadingHTTPServer(("", port), Handler) as server:
+        server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.bondcache", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="serve the cache, filling it lazily from upstream")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    precompute_parser = commands.add_parser("precompute", help="request all bond combinations of notebooks")
+    precompute_parser.add_argument("notebooks", nargs="+")
+    precompute_parser.add_argument("--max-combinations", type=int, default=1000)
+    for sub in (serve_parser, precompute_parser):
+        sub.add_argument("--upstream", required=True, help="url of a running slider server")
+        sub.add_argument("--cache", required=True, help="cache directory, served statically later on")
+    args = parser.parse_args(argv)
+
+    cache = BondCache(args.cache)
+    if args.command == "serve":
+        serve(cache, args.upstream, args.port)
+    else:
+        for path in args.notebooks:
+            misses = cache.misses
+            count = precompute(cache, args.upstream, path, max_combinations=args.max_combinations)
+            print(json.dumps({"notebook": path, "combinations": count, "fetched": cache.misses - misses}))
+
+
+if __name__ == "__main__":
+    main()
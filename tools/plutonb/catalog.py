@@ -0,0 +1,119 @@
+"""Index of the frontmatter of all notebooks in a collection.
+
+Collection pages list notebooks by their frontmatter: title, order, tags,
+image, author. `Catalog` reads only the header of a notebook file, up to its
+first cell, and keeps the frontmatter in a compact index file keyed by path,
+modification time and size. Files with a notebook extension which are not
+notebooks are indexed as well, without frontmatter. Updating the index only
+reads the headers of new or changed files, and queries are answered from memory.
+
+    python -m plutonb.catalog ../src --tag jolin
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from .notebook import LANGUAGES, MARKER, parse_frontmatter, write_atomic
+
+INDEX = ".plutonb-catalog.json"
+
+
+def read_header(path):
+    """The lines of a notebook file before its first cell."""
+    lines = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if MARKER.match(line):
+                break
+            lines.append(line)
+    return "".join(lines)
+
+
+class Catalog:
+    """Frontmatter of the notebooks below `root`, by path relative to `root`."""
+
+    def __init__(self, root, index=None):
+        self.root = root
+        self.index = index or os.path.join(root, INDEX)
+        self.entries = {}
+        try:
+            with open(self.index, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def update(self):
+        """Bring the index up to date with the files on disk. Returns the number of headers read."""
+        seen = {}
+        read = 0
+        for path, stat in _scan(self.root):
+            relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+            entry = self.entries.get(relative)
+            if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                header = read_header(path)
+                # plain scripts have no cell marker and are read entirely, hence they are remembered too
+                frontmatter = parse_frontmatter(header) if header.startswith("### A Pluto.jl notebook ###") else None
+                entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "frontmatter": frontmatter}
+                read += 1
+            seen[relative] = entry
+        if read or seen.keys() != self.entries.keys():
+            self.entries = seen
+            self.save()
+        return read
+
+    def save(self):
+        write_atomic(self.index, json.dumps(self.entries, separators=(",", ":"), sort_keys=True))
+
+    def notebooks(self, tag=None):
+        """`(path, frontmatter)` of all notebooks, or those tagged `tag`, sorted by their `order`, then title."""
+        found = [
+            (path, entry["frontmatter"]) for path, entry in self.entries.items()
+            if entry["frontmatter"] is not None and (tag is None or tag in entry["frontmatter"].get("tags", ()))
+        ]
+        return sorted(found, key=lambda item: (_order(item[1]), item[1].get("title", ""), item[0]))
+
+    def tags(self):
+        """Number of notebooks per tag."""
+        counts = {}
+        for _, frontmatter in self.notebooks():
+            for tag in frontmatter.get("tags", ()):
+                counts[tag] = counts.get(tag, 0) + 1
+        return counts
+
+
+def _order(frontmatter):
+    """Pluto saves `order` as string; notebooks without come last."""
+    try:
+        return float(frontmatter["order"])
+    except (KeyError, ValueError):
+        return float("inf")
+
+
+def _scan(directory):
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path)
+            elif os.path.splitext(entry.name)[1] in LANGUAGES:
+                yield entry.path, entry.stat()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.catalog", description=__doc__.split("\n\n")[0])
+    parser.add_argument("root", help="directory of the collection")
+    parser.add_argument("--index", help=f"index file, by default {INDEX} in the root")
+    parser.add_argument("--tag", help="only list notebooks with this tag")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    catalog = Catalog(args.root, args.index)
+    read = catalog.update()
+    for path, frontmatter in catalog.notebooks(args.tag):
+        print(json.dumps({"path": path, **frontmatter}))
+    print(f"{len(catalog.notebooks())} notebooks, {read} headers read, {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
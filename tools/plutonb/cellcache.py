@@ -0,0 +1,177 @@
+"""Persistent cache of the values cells define, for `plutonb.executor`.
+
+The key of a cell is the hash of its code, the values of all names it
+references and the embedded environment of the notebook. The values are those
+in the namespace when the cell is about to run, so whichever cell or widget
+set them, inside or outside of the cells being run, a changed value gives a new
+key. A restarted notebook then reads data heavy cells like the parsing of the
+dataset from disk instead of recomputing them.
+
+Values are hashed by pickling them, functions by their code, defaults,
+closures and the globals they use, modules by name. A cell referencing a
+value which cannot be hashed, e.g. a julia object, is not cached, and neither
+are the cells downstream of it unless the values they reference can be hashed.
+
+Only cells whose values can be pickled are cached. Cells calling julia or
+changing variables of other cells in place, like `d.append(c)`, are always
+run, and so is every cell containing the comment `# plutonb: no-cache`. The
+cache is bounded in size, evicting the entries read least recently. Entries
+which cannot be unpickled anymore, e.g. after a package update, count as
+missing.
+"""
+
+import hashlib
+import importlib
+import json
+import marshal
+import os
+import pickle
+import sys
+import types
+
+from .notebook import write_atomic
+
+NO_CACHE = "# plutonb: no-cache"
+
+
+class CellCache:
+    """Pickled cell values in `directory`, at most `max_bytes` in total."""
+
+    def __init__(self, directory, max_bytes=2 * 2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, graph, cell_id, namespace, hashes=None):
+        """Cache key of `cell_id` about to run in `namespace`, or `None` if a value it references cannot be hashed.
+
+        `hashes` keeps the hash of each value by name between calls, as
+        `name: (value, hash)`; names of values changed in place must be removed.
+        """
+        hashes = {} if hashes is None else hashes
+        values = {}
+        for name in sorted(graph.symbols[cell_id].referenced):
+            if name not in namespace:
+                continue
+            value = namespace[name]
+            known = hashes.get(name)
+            if known is None or known[0] is not value:
+                known = hashes[name] = (value, value_hash(value))
+            if known[1] is None:
+                return None
+            values[name] = known[1]
+        environment = json.dumps(graph.notebook.environment, sort_keys=True)
+        content = json.dumps([graph.notebook.cells[cell_id], values, environment, sys.version_info[:2]])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pickle")
+
+    def get(self, key):
+        """`(values, output)` stored under `key`, or `None`."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                entry = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, values, output):
+        """Store the values of a cell. Returns `False` if they cannot be pickled."""
+        try:
+            data = pickle.dumps((values, output), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        if len(data) > self.max_bytes:
+            return False
+        write_atomic(self.path(key), data)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Remove the entries read least recently until the cache fits into `max_bytes`."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".pickle"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+def cacheable(graph, cell_id, julia_names):
+    """Whether restoring the values `cell_id` defines can stand in for running it."""
+    symbols = graph.symbols[cell_id]
+    return (
+        NO_CACHE not in graph.notebook.cells[cell_id]
+        and not symbols.mutated - symbols.defined
+        and not symbols.referenced & julia_names
+        and not symbols.imported
+    )
+
+
+def value_hash(value):
+    """Hash of `value` as pickled, or `None` if it cannot be pickled."""
+    digest = _Digest()
+    try:
+        _HashPickler(digest).dump(value)
+    except Exception:
+        return None
+    return digest.hexdigest()
+
+
+class _Digest:
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+class _HashPickler(pickle.Pickler):
+    """Pickles functions by their code and modules by name, for hashing only."""
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.functions = set()
+
+    def reducer_override(self, value):
+        if isinstance(value, types.ModuleType):
+            return importlib.import_module, (value.__name__,)
+        if isinstance(value, types.FunctionType):
+            if id(value) in self.functions:
+                # recursion, the code is hashed already
+                return str, (value.__qualname__,)
+            self.functions.add(id(value))
+            code = value.__code__
+            used = {name: value.__globals__[name] for name in _names(code) if name in value.__globals__}
+            closure = [cell.cell_contents for cell in value.__closure__ or ()]
+            return _function, (marshal.dumps(code), value.__defaults__, value.__kwdefaults__, closure, used)
+        return NotImplemented
+
+
+def _names(code):
+    """Global names used by `code`, including nested functions and comprehensions."""
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _names(constant)
+    return sorted(names)
+
+
+def _function(*parts):
+    raise TypeError("hashed functions cannot be unpickled")
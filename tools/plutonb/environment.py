@@ -0,0 +1,122 @@
+"""Instantiated environments of notebooks, cached by the hash of their definition.
+
+Every notebook embeds its environment as `PLUTO_PROJECT_TOML_CONTENTS`,
+`PLUTO_MANIFEST_TOML_CONTENTS` and, for Python and R, `PLUTO_CONDAPKG_TOML_CONTENTS`.
+Notebooks with the same definitions share one instantiated and precompiled
+environment in `<cache>/<hash>`, with the julia packages in the shared depot
+`<cache>/depot` and the conda environment in `<cache>/<hash>/conda`. Only the
+first notebook with a new definition pays for setting it up.
+
+    python -m plutonb.environment ../src/JolinBasics/*.py --cache ~/.cache/plutonb/environments
+
+prints for every notebook the environment variables to start julia or Pluto
+with, so that packages and the conda environment are found ready.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+import tomllib
+from contextlib import contextmanager
+
+from .notebook import Notebook
+
+FILES = {"PROJECT": "Project.toml", "MANIFEST": "Manifest.toml", "CONDAPKG": "CondaPkg.toml"}
+READY = ".ready"
+
+
+def environment_hash(environment):
+    """Hash of the embedded environment definitions, as returned by `Notebook.environment`."""
+    content = json.dumps({kind: environment.get(kind, "") for kind in FILES}, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def variables(cache, directory):
+    """Environment variables for julia to use the prepared environment in `directory`."""
+    variables = {
+        "JULIA_PROJECT": directory,
+        # the empty entry after the separator keeps the default depots
+        "JULIA_DEPOT_PATH": os.path.join(cache, "depot") + os.pathsep,
+    }
+    if os.path.exists(os.path.join(directory, FILES["CONDAPKG"])):
+        variables["JULIA_CONDAPKG_ENV"] = os.path.join(directory, "conda")
+    return variables
+
+
+def instantiate_command(julia, project):
+    code = "using Pkg; Pkg.instantiate(); Pkg.precompile()"
+    if "CondaPkg" in project.get("deps", {}):
+        code += "; using CondaPkg; CondaPkg.resolve()"
+    return [julia, "--startup-file=no", "-e", code]
+
+
+@contextmanager
+def locked(path):
+    with open(path, "w") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def prepare(path, cache, julia="julia"):
+    """Directory of the instantiated environment of the notebook at `path`, and whether it was reused.
+
+    Concurrent calls for the same environment wait for each other, so it is only set up once.
+    """
+    cache = os.path.abspath(os.path.expanduser(cache))
+    environment = Notebook.read(path).environment
+    if "PROJECT" not in environment:
+        raise ValueError(f"{path} does not embed its environment")
+    directory = os.path.join(cache, environment_hash(environment))
+    if os.path.exists(os.path.join(directory, READY)):
+        return directory, True
+
+    os.makedirs(cache, exist_ok=True)
+    with locked(f"{directory}.lock"):
+        if os.path.exists(os.path.join(directory, READY)):
+            return directory, True
+        # leftovers of an interrupted setup
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        for kind, name in FILES.items():
+            if kind in environment:
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+                    file.write(environment[kind])
+        project = tomllib.loads(environment["PROJECT"])
+        subprocess.run(
+            instantiate_command(julia, project),
+            env={**os.environ, **variables(cache, directory)},
+            check=True,
+        )
+        open(os.path.join(directory, READY), "w").close()
+    return directory, False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.environment", description=__doc__.split("\n\n")[0])
+    parser.add_argument("notebooks", nargs="+")
+    parser.add_argument("--cache", default="~/.cache/plutonb/environments", help="directory for environments")
+    parser.add_argument("--julia", default="julia", help="julia executable")
+    args = parser.parse_args(argv)
+    cache = os.path.abspath(os.path.expanduser(args.cache))
+    for path in args.notebooks:
+        start = time.perf_counter()
+        directory, reused = prepare(path, cache, args.julia)
+        print(json.dumps({
+            "notebook": path,
+            "environment": os.path.basename(directory),
+            "reused": reused,
+            "seconds": round(time.perf_counter() - start, 3),
+            "variables": variables(cache, directory),
+        }))
+
+
+if __name__ == "__main__":
+    main()
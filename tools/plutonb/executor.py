@@ -0,0 +1,314 @@
+"""Run the Python cells of a notebook concurrently, following their dependencies.
+
+Pluto runs cells one after another. Many cells are independent though, e.g.
+the data download, loading julia packages and defining helper functions.
+`execute` starts every cell as soon as the cells defining the names it
+references are done, on a thread pool. Cells mutating a value in place, like
+`d.append(1)`, keep their place relative to the other cells using it. Cells calling julia via `jl` run on the
+calling thread, one at a time, in the order Pluto would run them, since julia
+must not be entered from several Python threads at once.
+
+The report lists the time of every cell and the critical path, the chain of
+dependent cells which bounds the total time however many threads are used.
+
+    python -m plutonb.executor ../src/JolinBasics/dashboard.py --workers 8
+"""
+
+import argparse
+import ast
+import ctypes
+import json
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from .cellcache import CellCache, cacheable
+from .notebook import Graph, Notebook
+from .profiler import Profiler
+
+JULIA_NAMES = frozenset({"jl"})
+
+
+class Cancelled(BaseException):
+    """Raised within cells superseded by newer input, see `execute`.
+
+    Derived from `BaseException`, like `KeyboardInterrupt`, so that cells
+    catching `Exception` do not swallow it.
+    """
+
+
+class CellRun:
+    """Timing and result of running one cell. `value` is the value of a final expression."""
+
+    __slots__ = ("cell_id", "start", "end", "thread", "value", "error", "cached", "cancelled")
+
+    def __init__(self, cell_id):
+        self.cell_id = cell_id
+        self.start = self.end = None
+        self.thread = None
+        self.value = None
+        self.error = None
+        self.cached = False
+        self.cancelled = False
+
+    @property
+    def seconds(self):
+        return 0.0 if self.start is None else self.end - self.start
+
+
+class Execution:
+    """All cell runs of one `execute` call."""
+
+    def __init__(self, graph, runs, start, end, after=None):
+        self.graph = graph
+        self.runs = runs
+        self.start = start
+        self.end = end
+        self.after = after or {}
+
+    @property
+    def seconds(self):
+        return self.end - self.start
+
+    def critical_path(self):
+        """The chain of dependent cells taking longest in total, and its time."""
+        finish = {}
+        previous = {}
+        for cell_id in self.graph.topological_order(self.runs):
+            waited = self.graph.upstream[cell_id] | self.after.get(cell_id, set())
+            upstream = [other for other in waited if other in finish]
+            before = max(upstream, key=finish.get, default=None)
+            previous[cell_id] = before
+            finish[cell_id] = (finish[before] if before else 0.0) + self.runs[cell_id].seconds
+        cell_id = max(finish, key=finish.get, default=None)
+        total = finish.get(cell_id, 0.0)
+        path = []
+        while cell_id is not None:
+            path.append(cell_id)
+            cell_id = previous[cell_id]
+        return path[::-1], total
+
+    def report(self):
+        path, seconds = self.critical_path()
+        return {
+            "seconds": round(self.seconds, 6),
+            "sequential_seconds": round(sum(run.seconds for run in self.runs.values()), 6),
+            "critical_path_seconds": round(seconds, 6),
+            "critical_path": path,
+            "cells": {
+                cell_id: {
+                    "start": round(run.start - self.start, 6) if run.start is not None else None,
+                    "seconds": round(run.seconds, 6),
+                    "thread": run.thread,
+                    "error": run.error,
+                    "cached": run.cached,
+                    "cancelled": run.cancelled,
+                }
+                for cell_id, run in self.runs.items()
+            },
+        }
+
+
+def compile_cell(code, cell_id):
+    """Code objects for the statements of a cell and its final expression, if any."""
+    tree = ast.parse(code, filename=cell_id)
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = compile(ast.Expression(tree.body.pop().value), cell_id, "eval")
+    return compile(tree, cell_id, "exec"), last
+
+
+def run_cell(code, cell_id, namespace):
+    body, last = compile_cell(code, cell_id)
+    exec(body, namespace)
+    return None if last is None else eval(last, namespace)
+
+
+def execute(
+    notebook, namespace=None, workers=4, cell_ids=None, julia_names=JULIA_NAMES, cache=None, cancelled=None,
+    profiler=None,
+):
+    """Run the cells of `notebook`, or only `cell_ids`, in `namespace` on up to `workers` threads.
+
+    A failing cell does not stop the others; cells depending on it are not run
+    and report the failing cell as their error, as Pluto does. With a
+    `CellCache`, cells restore their values from it where possible.
+
+    Once `cancelled()` returns true, no further cells are started, and the
+    cells running on the thread pool are interrupted by raising `Cancelled`
+    in them, which Python checks between bytecodes, i.e. also within long
+    loops. Cells calling julia always run to their end.
+
+    A `Profiler` measures every cell which is run, i.e. not restored from the cache.
+    """
+    graph = Graph(notebook)
+    namespace = {} if namespace is None else namespace
+    order = graph.topological_order(cell_ids)
+    position = {cell_id: i for i, cell_id in enumerate(order)}
+    selected = set(order)
+    runs = {cell_id: CellRun(cell_id) for cell_id in order}
+    after = graph.mutation_order(order)
+    before = {cell_id: (graph.upstream[cell_id] & selected) | after[cell_id] for cell_id in order}
+    followers = {cell_id: set() for cell_id in order}
+    for cell_id, others in before.items():
+        for other in others:
+            followers[other].add(cell_id)
+    waiting = {cell_id: len(others) for cell_id, others in before.items()}
+    on_caller = {cell_id for cell_id in order if graph.symbols[cell_id].referenced & julia_names}
+    ready = [cell_id for cell_id in order if waiting[cell_id] == 0]
+    hashes = {}
+    lock = threading.Lock()
+    running = {}
+    interrupted = set()
+    stopped = cancelled or (lambda: False)
+
+    def run(cell_id):
+        cell_run = runs[cell_id]
+        cell_run.thread = threading.current_thread().name
+        if stopped():
+            cell_run.cancelled = True
+            return cell_id
+        failed = [other for other in graph.upstream[cell_id] & selected if runs[other].error]
+        if failed:
+            cell_run.error = f"upstream cell {failed[0]} failed"
+            return cell_id
+        cell_run.start = time.perf_counter()
+        key = cache.key(graph, cell_id, namespace, hashes) if cache and cacheable(graph, cell_id, julia_names) else None
+        entry = cache.get(key) if key else None
+        if entry is not None:
+            values, cell_run.value = entry
+            namespace.update(values)
+            cell_run.cached = True
+        else:
+            try:
+                with profiler.cell(cell_id) if profiler else nullcontext():
+                    cell_run.value = run_interruptible(cell_id)
+            except Cancelled:
+                cell_run.cancelled = True
+            except Exception:
+                cell_run.error = traceback.format_exc(limit=-1).strip()
+            if key and cell_run.error is None and not cell_run.cancelled:
+                defined = graph.symbols[cell_id].defined
+                cache.put(key, {name: namespace[name] for name in defined if name in namespace}, cell_run.value)
+        # values the cell changed in place have to be hashed anew
+        for name in graph.symbols[cell_id].defined | graph.symbols[cell_id].mutated:
+            hashes.pop(name, None)
+        cell_run.end = time.perf_counter()
+        return cell_id
+
+    def run_interruptible(cell_id):
+        if cell_id in on_caller:
+            return run_cell(notebook.cells[cell_id], cell_id, namespace)
+        ident = threading.get_ident()
+        try:
+            with lock:
+                running[ident] = cell_id
+            return run_cell(notebook.cells[cell_id], cell_id, namespace)
+        finally:
+            with lock:
+                running.pop(ident, None)
+                # an interrupt which arrived too late for the cell must not hit the pool thread
+                _raise_in_thread(ident, None)
+
+    def interrupt():
+        with lock:
+            for ident, cell_id in running.items():
+                if cell_id not in interrupted:
+                    interrupted.add(cell_id)
+                    _raise_in_thread(ident, Cancelled)
+
+    def done(cell_id):
+        with lock:
+            for other in followers[cell_id]:
+                waiting[other] -= 1
+                if waiting[other] == 0:
+                    ready.append(other)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cell") as pool:
+        futures = {}
+        finished = set()
+        while not stopped():
+            with lock:
+                ready.sort(key=position.get)
+                local = [cell_id for cell_id in ready if cell_id in on_caller]
+                for cell_id in ready:
+                    if cell_id not in on_caller:
+                        futures[pool.submit(run, cell_id)] = cell_id
+                ready[:] = local[1:]
+            if local:
+                finished.add(run(local[0]))
+                done(local[0])
+                continue
+            if not futures:
+                break
+            completed, _ = wait(futures, timeout=0.05 if cancelled else None, return_when=FIRST_COMPLETED)
+            for future in completed:
+                cell_id = _result(future, futures.pop(future), runs)
+                finished.add(cell_id)
+                done(cell_id)
+        if futures:
+            interrupt()
+            for future in list(futures):
+                finished.add(_result(future, futures.pop(future), runs))
+    for cell_id in selected - finished:
+        if stopped():
+            runs[cell_id].cancelled = True
+        else:
+            runs[cell_id].error = "part of a dependency cycle"
+    return Execution(graph, runs, start, time.perf_counter(), after)
+
+
+def _result(future, cell_id, runs):
+    """The cell of a finished future, also if `Cancelled` arrived right after the cell itself."""
+    try:
+        return future.result()
+    except Cancelled:
+        runs[cell_id].cancelled = True
+        return cell_id
+
+
+def _raise_in_thread(ident, exception):
+    """Raise `exception` in the thread `ident` at its next bytecode, or clear a pending one with `None`."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(ident), None if exception is None else ctypes.py_object(exception)
+    )
+
+
+def julia_main():
+    """`jl` for running notebooks outside Pluto, via the optional juliacall package."""
+    try:
+        from juliacall import Main
+    except ImportError:
+        raise SystemExit("This notebook calls julia via `jl`. Install juliacall to run it outside Pluto.") from None
+    return Main
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.executor", description=__doc__.split("\n\n")[0])
+    parser.add_argument("notebook", help="Python notebook file")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cache", help="directory to keep cell values in between runs")
+    parser.add_argument("--cache-mb", type=int, default=2048, help="size limit of the cache")
+    parser.add_argument("--profile", help="HTML file for the profile of every cell, see plutonb.profiler")
+    args = parser.parse_args(argv)
+    notebook = Notebook.read(args.notebook)
+    namespace = {"__name__": "__main__"}
+    if any(symbols.referenced & JULIA_NAMES for symbols in Graph(notebook).symbols.values()):
+        namespace["jl"] = julia_main()
+    cache = CellCache(args.cache, args.cache_mb * 2**20) if args.cache else None
+    profiler = Profiler() if args.profile else None
+    execution = execute(notebook, namespace, workers=args.workers, cache=cache, profiler=profiler)
+    json.dump(execution.report(), sys.stdout, indent=1)
+    print()
+    if profiler:
+        profiler.close()
+        with open(args.profile, "w", encoding="utf-8") as file:
+            file.write(profiler.html(notebook))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Incremental, parallel export of the notebook collection to HTML.
+
+Every notebook is exported by its own julia process running PlutoSliderServer.
+`export` hashes the content of each notebook, which includes its embedded
+environment, together with the export command, and skips notebooks whose hash
+is the same as at their last successful export. The others are exported with
+at most `jobs` julia processes at a time.
+
+The hashes are kept in `<output>/.plutonb-export.json`, updated after every
+notebook, so that an interrupted build resumes where it stopped.
+
+As exporting notebook by notebook skips PlutoSliderServer's own collection
+index, `export` writes `pluto_export.json` itself, in the same schema: the
+exported notebooks with their hash and frontmatter, plus title, description
+and collections from `pluto_export_configuration.json` in the root directory
+or its parent. Hence the output can serve as featured source for Pluto.
+
+    python -m plutonb.export ../src --output ../build --jobs 2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .bondcache import notebook_hash
+from .environment import prepare, variables
+from .notebook import Notebook, notebook_files, write_atomic
+
+STATE = ".plutonb-export.json"
+INDEX = "pluto_export.json"
+CONFIGURATION = "pluto_export_configuration.json"
+EXPORT_CODE = (
+    "using PlutoSliderServer; "
+    "PlutoSliderServer.export_notebook(ARGS[1]; Export_output_dir=ARGS[2], Export_baked_state=true)"
+)
+
+
+def export_command(julia, project):
+    command = [julia, "--startup-file=no"]
+    if project:
+        command.append(f"--project={project}")
+    return [*command, "-e", EXPORT_CODE]
+
+
+def notebook_key(path, command):
+    """Hash of the notebook file and the command exporting it."""
+    digest = hashlib.sha256(json.dumps(command).encode())
+    with open(path, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()
+
+
+def read_state(output):
+    try:
+        with open(os.path.join(output, STATE), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_state(output, state):
+    write_atomic(os.path.join(output, STATE), json.dumps(state, indent=1, sort_keys=True))
+
+
+def read_configuration(root):
+    """Title, description and collections from `pluto_export_configuration.json` in `root` or its parent."""
+    root = os.path.abspath(root)
+    for directory in [root, os.path.dirname(root)]:
+        try:
+            with open(os.path.join(directory, CONFIGURATION), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            pass
+    return {}
+
+
+def html_path(output, relative):
+    """Path of the HTML export of a notebook, relative to `output`."""
+    base, _ = os.path.splitext(relative)
+    candidates = [f"{base}.html", f"{relative}.html"]
+    found = next((c for c in candidates if os.path.exists(os.path.join(output, c))), candidates[0])
+    return found.replace(os.sep, "/")
+
+
+def write_index(output, paths, state, configuration):
+    """Write `pluto_export.json` listing the exported notebooks, as `PlutoSliderServer.export_directory` does."""
+    notebooks = {}
+    for relative in sorted(set(paths) & set(state)):
+        path = paths[relative]
+        digest = notebook_hash(path)
+        notebook_id = relative.replace(os.sep, "/")
+        notebooks[notebook_id] = {
+            "id": notebook_id,
+            "hash": digest,
+            "html_path": html_path(output, relative),
+            # state and notebook file are baked into the HTML
+            "statefile_path": None,
+            "notebookfile_path": None,
+            "current_hash": digest,
+            "desired_hash": digest,
+            "frontmatter": Notebook.read(path).frontmatter,
+        }
+    index = {"title": None, "description": None, "collections": None, **configuration}
+    index.update(notebooks=notebooks, format_version=1)
+    write_atomic(os.path.join(output, INDEX), json.dumps(index, indent=1, sort_keys=True))
+
+
+def export(root, output, jobs=2, julia="julia", project=None, environments=None, force=False):
+    """Export the changed notebooks below `root` into `output`. Returns the export result per notebook.
+
+    With `environments`, the embedded environment of every notebook is
+    instantiated via `plutonb.environment` first, and reused across builds.
+    """
+    output = os.path.abspath(output)
+    os.makedirs(output, exist_ok=True)
+    command = export_command(julia, project)
+    state = read_state(output)
+    lock = threading.Lock()
+
+    paths = {}
+    for path in notebook_files([root]):
+        with open(path, encoding="utf-8") as file:
+            if file.readline().startswith("### A Pluto.jl notebook ###"):
+                paths[os.path.relpath(path, root)] = path
+    for relative in set(state) - set(paths):
+        del state[relative]
+    keys = {relative: notebook_key(path, command) for relative, path in paths.items()}
+    changed = [relative for relative in sorted(paths) if force or state.get(relative) != keys[relative]]
+    results = {relative: {"notebook": relative, "status": "unchanged"} for relative in paths}
+
+    def run(relative):
+        start = time.perf_counter()
+        path = paths[relative]
+        env = dict(os.environ)
+        if environments:
+            directory, _ = prepare(path, environments, julia)
+            env.update(variables(os.path.abspath(os.path.expanduser(environments)), directory))
+            # PlutoSliderServer itself comes from `project` or the default environment
+            env.pop("JULIA_PROJECT")
+        target = os.path.join(output, os.path.dirname(relative))
+        os.makedirs(target, exist_ok=True)
+        process = subprocess.run([*command, os.path.abspath(path), target], env=env, capture_output=True, text=True)
+        result = {"notebook": relative, "seconds": round(time.perf_counter() - start, 3)}
+        if process.returncode == 0:
+            result["status"] = "exported"
+            with lock:
+                state[relative] = keys[relative]
+                write_state(output, state)
+        else:
+            result["status"] = "failed"
+            result["error"] = process.stderr[-2000:]
+        return result
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for future in as_completed([pool.submit(run, relative) for relative in changed]):
+            result = future.result()
+            results[result["notebook"]] = result
+    write_state(output, state)
+    write_index(output, paths, state, read_configuration(root))
+    return [results[relative] for relative in sorted(results)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.export", description=__doc__.split("\n\n")[0])
+    parser.add_argument("root", help="directory with the notebooks, e.g. ../src")
+    parser.add_argument("--output", default="build", help="directory for the exported HTML")
+    parser.add_argument("--jobs", type=int, default=2, help="julia processes running at the same time")
+    parser.add_argument("--julia", default="julia", help="julia executable")
+    parser.add_argument("--project", help="julia project providing PlutoSliderServer")
+    parser.add_argument("--environments", help="cache directory of plutonb.environment to reuse")
+    parser.add_argument("--force", action="store_true", help="export all notebooks, changed or not")
+    args = parser.parse_args(argv)
+    results = export(args.root, args.output, args.jobs, args.julia, args.project, args.environments, args.force)
+    for result in results:
+        print(json.dumps(result))
+    if any(result["status"] == "failed" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Reduced notebooks for views on a few cells only.
+
+Jolin opens dedicated views with `&isolated_cell=1&isolated_cell=2`, counting
+the displayed cells from 0. Running the whole notebook for such a view is
+wasteful. `isolate` writes a notebook with only the requested cells and their
+upstream dependency closure, plus the embedded environment, which can be run
+instead. All other cells are left empty rather than removed, so the indices of
+the requested cells, and with them existing view URLs, stay the same.
+
+Reduced notebooks are cached per notebook version, i.e. the hash of the file
+content, so every further request for the same view is a file lookup.
+
+    python -m plutonb.isolate ../src/JolinBasics/dashboard.py 1 2 --cache build/isolated
+"""
+
+import argparse
+import hashlib
+import os
+
+from .notebook import Notebook, upstream_closure, write_atomic
+
+
+def isolate(path, cell_indices, cache):
+    """Path of the reduced notebook showing the cells at `cell_indices` of the notebook at `path`."""
+    with open(path, "rb") as file:
+        content = file.read()
+    version = hashlib.sha256(content).hexdigest()
+    name, extension = os.path.splitext(os.path.basename(path))
+    indices = sorted(set(cell_indices))
+    target = os.path.join(cache, version, f"{name}.cells-{'-'.join(map(str, indices))}{extension}")
+    if os.path.exists(target):
+        return target
+
+    notebook = Notebook.parse(content.decode("utf-8"))
+    try:
+        cell_ids = [notebook.order[index][0] for index in indices]
+    except IndexError:
+        raise ValueError(f"{path} has only {len(notebook.order)} cells") from None
+    reduced = notebook.subset(upstream_closure(notebook, cell_ids), placeholders=True)
+
+    write_atomic(target, reduced.format())
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.isolate", description=__doc__.split("\n\n")[0])
+    parser.add_argument("notebook", help="Python notebook file")
+    parser.add_argument("cells", nargs="+", type=int, help="indices of displayed cells, starting at 0")
+    parser.add_argument("--cache", default="build/isolated", help="directory for reduced notebooks")
+    args = parser.parse_args(argv)
+    print(isolate(args.notebook, args.cells, args.cache))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Minimal MessagePack encoder, enough for the bond values Pluto sends."""
+
+import struct
+
+
+def packb(value):
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def _pack(value, out):
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out += b"\xcb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_header(len(data), out, fix=0xA0, fixmax=31, sizes=(0xD9, 0xDA, 0xDB))
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_header(len(value), out, fix=None, fixmax=-1, sizes=(0xC4, 0xC5, 0xC6))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), out, fix=0x90, fixmax=15, sizes=(None, 0xDC, 0xDD))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_header(len(value), out, fix=0x80, fixmax=15, sizes=(None, 0xDE, 0xDF))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"cannot pack {type(value).__name__}")
+
+
+def _pack_int(value, out):
+    if 0 <= value <= 0x7F:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        for code, fmt in ((0xCC, ">B"), (0xCD, ">H"), (0xCE, ">I"), (0xCF, ">Q")):
+            if value < 1 << (8 * struct.calcsize(fmt)):
+                out += bytes([code]) + struct.pack(fmt, value)
+                return
+        raise OverflowError(value)
+    else:
+        for code, fmt in ((0xD0, ">b"), (0xD1, ">h"), (0xD2, ">i"), (0xD3, ">q")):
+            if value >= -(1 << (8 * struct.calcsize(fmt) - 1)):
+                out += bytes([code]) + struct.pack(fmt, value)
+                return
+        raise OverflowError(value)
+
+
+def _pack_header(size, out, fix, fixmax, sizes):
+    if size <= fixmax:
+        out.append(fix | size)
+        return
+    for code, fmt in zip(sizes, (">B", ">H", ">I")):
+        if code is not None and size < 1 << (8 * struct.calcsize(fmt)):
+            out += bytes([code]) + struct.pack(fmt, size)
+            return
+    raise OverflowError(size)
@@ -0,0 +1,510 @@
+"""Reading and analysing Pluto notebook files.
+
+A notebook file consists of
+
+- a header with the `#> [frontmatter]` block,
+- cells, each starting with `# ╔═╡ <cell id>`, saved in topological order,
+- embedded environments in the cells `00000000-0000-0000-0000-00000000000x`,
+  e.g. `PLUTO_PROJECT_TOML_CONTENTS`,
+- the `# ╔═╡ Cell order:` footer, listing the displayed order, where `╠═`
+  marks cells whose code is shown and `╟─` cells whose code is hidden.
+
+`Notebook.parse` splits a file in a single pass over its text. `Graph`
+analyses which global names the Python cells define and reference. Both are
+fast enough to go through thousands of notebooks in seconds:
+
+    python -m plutonb.notebook ../src
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tomllib
+
+MARKER = re.compile(r"^# ╔═╡ (?:([0-9a-f-]{36})|Cell order:)\n", re.M)
+ORDER_MARKER = "# ╔═╡ Cell order:\n"
+ORDER_ENTRY = re.compile(r"^# (╠═|╟─)([0-9a-f-]{36})$", re.M)
+FRONTMATTER_LINE = re.compile(r"^#> ?(.*)$", re.M)
+ENVIRONMENT_CONTENTS = re.compile(r"^PLUTO_(\w+)_TOML_CONTENTS = (\"\"\"|')\n?(.*)\2\s*$", re.S)
+PACKAGE_CELL = re.compile(r"""seval\(\s*["']\s*using\b""")
+ENVIRONMENT_CELL_PREFIX = "00000000-0000-0000-0000-"
+LANGUAGES = {".py": "python", ".R": "r", ".r": "r", ".jl": "julia"}
+
+
+class Notebook:
+    """The cells of a notebook file.
+
+    `cells` maps cell id to code in file order, which Pluto keeps topologically
+    sorted. `order` lists `(cell id, code shown)` in the order displayed.
+    """
+
+    def __init__(self, header, cells, order, language="python"):
+        self.header = header
+        self.cells = cells
+        self.order = order
+        self.language = language
+
+    @classmethod
+    def read(cls, path):
+        with open(path, encoding="utf-8") as file:
+            return cls.parse(file.read(), LANGUAGES.get(os.path.splitext(path)[1], "python"))
+
+    @classmethod
+    def parse(cls, text, language="python"):
+        header = None
+        cells = {}
+        order = []
+        cell_id, start = None, 0
+        for match in MARKER.finditer(text):
+            if cell_id is not None:
+                cells[cell_id] = text[start:match.start()]
+            elif header is None:
+                header = text[:match.start()]
+            cell_id, start = match.group(1), match.end()
+            if cell_id is None:
+                order = [(id_, marker == "╠═") for marker, id_ in ORDER_ENTRY.findall(text, start)]
+                break
+        else:
+            if cell_id is not None:
+                cells[cell_id] = text[start:]
+        return cls(text if header is None else header, cells, order, language)
+
+    def format(self):
+        cells = "".join(f"# ╔═╡ {cell_id}\n{code}" for cell_id, code in self.cells.items())
+        order = "".join(f"# {'╠═' if shown else '╟─'}{cell_id}\n" for cell_id, shown in self.order)
+        return self.header + cells + ORDER_MARKER + order
+
+    @property
+    def frontmatter(self):
+        """The `#> [frontmatter]` block of the header, as dict."""
+        return parse_frontmatter(self.header)
+
+    @property
+    def environment(self):
+        """Raw TOML text of the embedded environment, e.g. `{"PROJECT": ..., "MANIFEST": ..., "CONDAPKG": ...}`."""
+        environment = {}
+        for cell_id, code in self.cells.items():
+            if cell_id.startswith(ENVIRONMENT_CELL_PREFIX):
+                match = ENVIRONMENT_CONTENTS.match(code)
+                if match:
+                    environment[match.group(1)] = match.group(3)
+        return environment
+
+    def code_cells(self):
+        """Cell id and code of all cells but the embedded environment."""
+        return {cell_id: code for cell_id, code in self.cells.items() if not cell_id.startswith(ENVIRONMENT_CELL_PREFIX)}
+
+    def subset(self, cell_ids, placeholders=False):
+        """A notebook with only the given cells, plus the embedded environment.
+
+        With `placeholders` the other cells are kept empty instead of removed, so
+        every cell keeps its index in `order`.
+        """
+        keep = set(cell_ids) | {cell_id for cell_id in self.cells if cell_id.startswith(ENVIRONMENT_CELL_PREFIX)}
+        if placeholders:
+            return Notebook(
+                self.header,
+                {cell_id: code if cell_id in keep else "\n" for cell_id, code in self.cells.items()},
+                list(self.order),
+                self.language,
+            )
+        return Notebook(
+            self.header,
+            {cell_id: code for cell_id, code in self.cells.items() if cell_id in keep},
+            [(cell_id, shown) for cell_id, shown in self.order if cell_id in keep],
+            self.language,
+        )
+
+
+def parse_frontmatter(header):
+    lines = FRONTMATTER_LINE.findall(header)
+    if not lines:
+        return {}
+    return tomllib.loads("\n".join(lines)).get("frontmatter", {})
+
+
+def write_atomic(path, data):
+    """Write `data`, text or bytes, to `path` via a temporary file next to it, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # unlike `tempfile.mkstemp`, `open` keeps the permissions of the umask, for files served later on
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as file:
+            file.write(data.encode("utf-8") if isinstance(data, str) else data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_cells(path):
+    """Map cell id to cell code, in the order the cells are saved in the file."""
+    return Notebook.read(path).cells
+
+
+class Symbols:
+    """Global names a Python cell defines, references, imports and presumably mutates in place."""
+
+    __slots__ = ("defined", "referenced", "imported", "mutated")
+
+    def __init__(self, defined=(), referenced=(), imported=(), mutated=()):
+        self.defined = set(defined)
+        self.referenced = set(referenced)
+        self.imported = set(imported)
+        self.mutated = set(mutated)
+
+
+def analyse(code):
+    """`Symbols` of a Python cell, from a single parse.
+
+    Names interpolated as `$name` into strings count as references, as for
+    `jl.MD`. Names local to functions and lambdas are ignored.
+
+    Mutations are method calls like `collection.append(x)` whose result is
+    thrown away, at top level or inside functions. This includes the last top
+    level statement, although its result is the cell output: a cell like
+    `d.append(c)` changes `d` all the same. Calls on modules, like
+    `plt.close(figure)`, are only excluded by `Graph`, which knows the
+    imports of all cells.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return Symbols()
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    symbols = Symbols()
+    for node in tree.body:
+        if isinstance(node, definitions):
+            symbols.defined.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = {(alias.asname or alias.name).split(".")[0] for alias in node.names}
+            symbols.defined.update(names)
+            symbols.imported.update(names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            for target in node.targets if isinstance(node, ast.Assign) else [node.target]:
+                symbols.defined.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+
+    visitor = _References()
+    visitor.visit(tree)
+    symbols.referenced = visitor.references - symbols.defined
+
+    statements = [statement for statement in tree.body if not isinstance(statement, definitions)]
+    symbols.mutated = _discarded_calls(statements, local=set())
+    for function, local in visitor.functions:
+        symbols.mutated.update(_discarded_calls(function.body, local))
+    return symbols
+
+
+class _References(ast.NodeVisitor):
+    def __init__(self):
+        self.references = set()
+        self.scopes = []
+        self.functions = []
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and not any(node.id in scope for scope in self.scopes):
+            self.references.add(node.id)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str) and "$" in node.value:
+            self.references.update(re.findall(r"\$([A-Za-z_]\w*)", node.value))
+
+    def visit_FunctionDef(self, node):
+        for child in [*node.decorator_list, *node.args.defaults, *filter(None, node.args.kw_defaults)]:
+            self.visit(child)
+        local = _argument_names(node.args)
+        local.update(n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store))
+        self.functions.append((node, local))
+        self.scopes.append(local)
+        for child in node.body:
+            self.visit(child)
+        self.scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.scopes.append(_argument_names(node.args))
+        self.visit(node.body)
+        self.scopes.pop()
+
+
+def _discarded_calls(statements, local):
+    return {
+        node.value.func.value.id
+        for statement in statements
+        for node in ast.walk(statement)
+        if isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Call)
+        and isinstance(node.value.func, ast.Attribute)
+        and isinstance(node.value.func.value, ast.Name)
+        and node.value.func.value.id not in local
+    }
+
+
+def _argument_names(arguments):
+    names = {a.arg for a in [*arguments.posonlyargs, *arguments.args, *arguments.kwonlyargs]}
+    names.update(a.arg for a in (arguments.vararg, arguments.kwarg) if a)
+    return names
+
+
+class Graph:
+    """Dependencies between the Python cells of a notebook.
+
+    `upstream[cell]` are the cells defining names `cell` references,
+    `downstream[cell]` the cells referencing names `cell` defines.
+    """
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self.symbols = {cell_id: analyse(code) for cell_id, code in notebook.code_cells().items()}
+        imported = set().union(*(symbols.imported for symbols in self.symbols.values()))
+        for symbols in self.symbols.values():
+            symbols.mutated -= imported
+        self.definers = {}
+        for cell_id, symbols in self.symbols.items():
+            for name in symbols.defined:
+                self.definers.setdefault(name, cell_id)
+        self.upstream = {
+            cell_id: {self.definers[name] for name in symbols.referenced if name in self.definers} - {cell_id}
+            for cell_id, symbols in self.symbols.items()
+        }
+        self.downstream = {cell_id: set() for cell_id in self.symbols}
+        for cell_id, upstream in self.upstream.items():
+            for other in upstream:
+                self.downstream[other].add(cell_id)
+
+    def package_cells(self):
+        """Cells loading julia packages via `jl.seval("using ...")`."""
+        return [cell_id for cell_id in self.symbols if PACKAGE_CELL.search(self.notebook.cells[cell_id])]
+
+    def bonds(self):
+        """Map bound variable name to the cell binding it."""
+        return {bond.name: cell_id for cell_id in self.symbols for bond in _python_bonds(self.notebook.cells[cell_id])}
+
+    def topological_order(self, cell_ids=None):
+        """The given cells, or all, ordered such that every cell comes after its upstream cells.
+
+        Ties keep the file order. Cells within a dependency cycle are appended in file order.
+        """
+        cell_ids = list(self.symbols) if cell_ids is None else [c for c in self.symbols if c in set(cell_ids)]
+        selected = set(cell_ids)
+        waiting = {cell_id: len(self.upstream[cell_id] & selected) for cell_id in cell_ids}
+        ready = [cell_id for cell_id in cell_ids if waiting[cell_id] == 0]
+        position = {cell_id: i for i, cell_id in enumerate(cell_ids)}
+        ordered = []
+        while ready:
+            cell_id = ready.pop(0)
+            ordered.append(cell_id)
+            for other in sorted(self.downstream[cell_id] & selected, key=position.get):
+                waiting[other] -= 1
+                if waiting[other] == 0:
+                    ready.append(other)
+            ready.sort(key=position.get)
+        done = set(ordered)
+        return ordered + [cell_id for cell_id in cell_ids if cell_id not in done]
+
+    def mutation_order(self, order):
+        """Map every cell of `order` to the earlier cells of `order` it has to wait for, besides `upstream`.
+
+        A cell mutating a name in place runs after the cells before it using the
+        name, and before the cells after it, as in Pluto's sequential order.
+        Otherwise `e = len(d)` could see `d.append(1)` or not, by chance.
+        """
+        after = {cell_id: set() for cell_id in order}
+        users = {}
+        for cell_id in order:
+            symbols = self.symbols[cell_id]
+            for name in (symbols.referenced | symbols.mutated) - symbols.defined:
+                users.setdefault(name, []).append(cell_id)
+        for name, cell_ids in users.items():
+            mutating = [cell_id for cell_id in cell_ids if name in self.symbols[cell_id].mutated]
+            if not mutating:
+                continue
+            for i, cell_id in enumerate(cell_ids):
+                before = cell_ids[:i] if cell_id in mutating else [other for other in mutating if other in cell_ids[:i]]
+                after[cell_id].update(before)
+        return after
+
+    def downstream_closure(self, cell_ids):
+        """The given cells and every cell depending on them, directly or indirectly."""
+        closure = set()
+        stack = list(cell_ids)
+        while stack:
+            cell_id = stack.pop()
+            if cell_id not in closure:
+                closure.add(cell_id)
+                stack.extend(self.downstream.get(cell_id, ()))
+        return closure
+
+    def upstream_closure(self, cell_ids):
+        """The given cells together with every cell they depend on, directly or indirectly.
+
+        Cells mutating a variable of the closure in place belong to it as well,
+        imported modules aside. So do cells using a function with such effects,
+        e.g. to run it in a background thread. Cells loading julia packages via
+        `jl.seval("using ...")` are always included, as their effect is invisible
+        to the Python analysis.
+        """
+        closure = set()
+        stack = [*cell_ids, *self.package_cells()]
+        while stack:
+            while stack:
+                cell_id = stack.pop()
+                if cell_id not in closure:
+                    closure.add(cell_id)
+                    stack.extend(self.upstream[cell_id])
+            effects = {
+                cell_id for cell_id, symbols in self.symbols.items()
+                if any(self.definers.get(name) in closure for name in symbols.mutated)
+            }
+            effectful = set().union(*(self.symbols[cell_id].defined for cell_id in effects))
+            stack = [
+                cell_id for cell_id, symbols in self.symbols.items()
+                if cell_id not in closure and (cell_id in effects or symbols.referenced & effectful)
+            ]
+        return closure
+
+
+def upstream_closure(notebook, cell_ids):
+    return Graph(notebook).upstream_closure(cell_ids)
+
+
+class Bond:
+    """A widget bound to the variable `name`, e.g. via `jl.viewof` or `@bind`."""
+
+    def __init__(self, name, widget, options):
+        self.name = name
+        self.widget = widget
+        self.options = options
+
+    def __repr__(self):
+        return f"Bond({self.name!r}, {self.widget!r}, {self.options!r})"
+
+    def possible_values(self):
+        """The values the browser sends for this bond, or `None` if unknown.
+
+        PlutoUI sliders send the 1-based position of the chosen value, checkboxes send booleans.
+        """
+        if self.widget == "Slider" and self.options is not None:
+            return list(range(1, len(self.options) + 1))
+        if self.widget == "CheckBox":
+            return [False, True]
+        return None
+
+
+def bonds(path):
+    """All bonds of a notebook file. `options` is `None` where they are not a literal list."""
+    if path.endswith(".py"):
+        return [bond for code in Notebook.read(path).code_cells().values() for bond in _python_bonds(code)]
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    if path.endswith(".jl"):
+        pattern = r"@bind\s+(\w+)\s+(?:PlutoUI\.)?(\w+)\((\[[^\]]*\])?"
+    else:
+        pattern = r"%<-%\s*viewof\(\"(\w+)\",\s*julia_call\(\"(\w+)\",\s*(c\([^)]*\))?"
+    return [Bond(name, widget, _literal_list(options)) for name, widget, options in re.findall(pattern, text)]
+
+
+def _python_bonds(code):
+    if "viewof" not in code:
+        return
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and _attribute_name(node.func) == "viewof"
+            and len(node.args) >= 2
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[1], ast.Call)
+        ):
+            widget = node.args[1]
+            options = None
+            if widget.args and isinstance(widget.args[0], (ast.List, ast.Tuple)):
+                try:
+                    options = ast.literal_eval(widget.args[0])
+                except ValueError:
+                    pass
+                else:
+                    options = list(options)
+            yield Bond(node.args[0].value, _attribute_name(widget.func), options)
+
+
+def _attribute_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _literal_list(text):
+    """Parse a julia `[...]` or R `c(...)` literal of numbers and strings."""
+    if not text:
+        return None
+    if text.startswith("c("):
+        text = "[" + text[2:-1] + "]"
+    text = text.replace("TRUE", "true").replace("FALSE", "false")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def notebook_files(paths):
+    """Notebook files among `paths`, descending into directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1] in LANGUAGES:
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def summary(path):
+    notebook = Notebook.read(path)
+    entry = {
+        "path": path,
+        "language": notebook.language,
+        "title": notebook.frontmatter.get("title"),
+        "cells": len(notebook.code_cells()),
+        "environment": sorted(notebook.environment),
+    }
+    if notebook.language == "python":
+        graph = Graph(notebook)
+        entry["edges"] = sum(map(len, graph.upstream.values()))
+        entry["bonds"] = sorted(graph.bonds())
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m plutonb.notebook", description="Summarise the structure of notebook files.")
+    parser.add_argument("paths", nargs="+", help="notebook files or directories")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    count = 0
+    for path in notebook_files(args.paths):
+        try:
+            with open(path, encoding="utf-8") as file:
+                if not file.readline().startswith("### A Pluto.jl notebook ###"):
+                    continue
+            print(json.dumps(summary(path)))
+        except (OSError, UnicodeDecodeError, tomllib.TOMLDecodeError) as error:
+            print(f"{path}: {error}", file=sys.stderr)
+        count += 1
+    print(f"analysed {count} notebooks in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
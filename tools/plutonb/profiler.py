@@ -0,0 +1,224 @@
+"""Per cell profile of notebook runs: time, CPU time, memory blocks and stack samples.
+
+`execute` and `Session` take a `Profiler`, which accumulates for every cell id
+the number of runs, the wall and CPU time and the net change in the number of
+memory blocks Python holds, i.e. the blocks allocated and not freed again by
+the end of the run. Temporary allocations do not show, counting each of them
+would take `tracemalloc` and slow every allocation down. Cells still running
+after `sample_after` seconds are sampled by a background thread every
+`interval` seconds, and the stacks seen are kept in folded form, the input of
+common flamegraph tools.
+
+Only the cells run by `plutonb`'s executor and `Session` are measured, not
+those Pluto evaluates itself.
+
+Profiling a cell run costs a few clock reads, and a sample a walk over one
+stack, far below 1% of any cell worth looking at. The cells running at the
+same time share the block counter of the process, hence with several workers
+the blocks are only roughly attributed.
+
+The report, a table sortable by every column and a flamegraph of the samples,
+is HTML, shown as output when a notebook cell returns the profiler, or written
+by the executor:
+
+    python -m plutonb.executor ../src/JolinBasics/dashboard.py --profile profile.html
+"""
+
+import html
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class CellProfile:
+    """Measurements of all runs of one cell. `stacks` counts samples by folded stack."""
+
+    __slots__ = ("runs", "wall", "cpu", "blocks", "stacks")
+
+    def __init__(self):
+        self.runs = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocks = 0
+        self.stacks = Counter()
+
+
+class Profiler:
+    """Collects a `CellProfile` per cell id. With `sample_after=None` no stacks are sampled."""
+
+    def __init__(self, sample_after=0.05, interval=0.01):
+        self.sample_after = sample_after
+        self.interval = interval
+        self.cells = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    @contextmanager
+    def cell(self, cell_id):
+        """Measure the run of `cell_id` within the block, which runs on the current thread."""
+        ident = threading.get_ident()
+        with self._lock:
+            self.cells.setdefault(cell_id, CellProfile())
+            if self.sample_after is not None and self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+                self._sampler.start()
+        blocks = sys.getallocatedblocks()
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        with self._lock:
+            self._running[ident] = (cell_id, start)
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu
+            blocks = sys.getallocatedblocks() - blocks
+            with self._lock:
+                del self._running[ident]
+                profile = self.cells[cell_id]
+                profile.runs += 1
+                profile.wall += wall
+                profile.cpu += cpu
+                profile.blocks += blocks
+
+    def close(self):
+        """Stop sampling."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            with self._lock:
+                slow = [(ident, cell_id) for ident, (cell_id, start) in self._running.items() if now - start >= self.sample_after]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for ident, cell_id in slow:
+                stack = _folded(frames.get(ident), cell_id)
+                if stack:
+                    with self._lock:
+                        self.cells[cell_id].stacks[stack] += 1
+
+    def report(self):
+        """Measurements per cell id, the slowest cell first."""
+        with self._lock:
+            cells = sorted(self.cells.items(), key=lambda item: -item[1].wall)
+            return {
+                cell_id: {
+                    "runs": profile.runs,
+                    "wall_seconds": round(profile.wall, 6),
+                    "cpu_seconds": round(profile.cpu, 6),
+                    "net_blocks": profile.blocks,
+                    "samples": sum(profile.stacks.values()),
+                }
+                for cell_id, profile in cells
+            }
+
+    def folded(self):
+        """All samples as folded stacks, `cell;outer;...;inner count` per line."""
+        with self._lock:
+            stacks = Counter()
+            for profile in self.cells.values():
+                stacks.update(profile.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def html(self, notebook=None):
+        """The report as HTML. With the `Notebook`, cells are labelled with their first line of code."""
+        def label(cell_id):
+            if notebook is None or cell_id not in notebook.cells:
+                return cell_id
+            first = next((line.strip() for line in notebook.cells[cell_id].splitlines() if line.strip()), "")
+            return f"{cell_id[:8]} {first[:60]}"
+
+        report = self.report()
+        columns = ["runs", "wall_seconds", "cpu_seconds", "net_blocks", "samples"]
+        head = "".join(f"<th>{name}</th>" for name in columns)
+        rows = "".join(
+            f"<tr><td title='{cell_id}'>{html.escape(label(cell_id))}</td>"
+            + "".join(f"<td data-value='{values[name]}'>{values[name]}</td>" for name in columns)
+            + "</tr>"
+            for cell_id, values in report.items()
+        )
+        tree = _tree(self.folded(), label)
+        return (
+            f"<div class='plutonb-profile'><style>{_STYLE}</style>"
+            f"<table><thead><tr><th>cell</th>{head}</tr></thead><tbody>{rows}</tbody></table>"
+            f"<div class='flamegraph'>{_flame(tree, tree['value']) if tree['value'] else ''}</div>"
+            f"<script>{_SORT}</script></div>"
+        )
+
+    def _repr_html_(self):
+        return self.html()
+
+
+def _folded(frame, cell_id):
+    """The stack of `frame` from the top level of the cell down, or `None` if it is not within the cell."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        if code.co_filename == cell_id and code.co_name == "<module>":
+            return ";".join([cell_id, *reversed(names)])
+        frame = frame.f_back
+    return None
+
+
+def _tree(folded, label):
+    root = {"name": "all", "value": 0, "children": {}}
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        node = root
+        node["value"] += int(count)
+        for i, name in enumerate(stack.split(";")):
+            node = node["children"].setdefault(name, {"name": label(name) if i == 0 else name, "value": 0, "children": {}})
+            node["value"] += int(count)
+    return root
+
+
+def _flame(node, total):
+    children = "".join(_flame(child, node["value"]) for child in sorted(node["children"].values(), key=lambda n: -n["value"]))
+    name = html.escape(node["name"])
+    return (
+        f"<div class='frame' style='width:{100 * node['value'] / total:.3f}%'>"
+        f"<span title='{name}, {node['value']} samples'>{name}</span><div class='children'>{children}</div></div>"
+    )
+
+
+_STYLE = """
+.plutonb-profile table { border-collapse: collapse; font-size: 0.85em; }
+.plutonb-profile th { cursor: pointer; }
+.plutonb-profile td, .plutonb-profile th { padding: 2px 8px; text-align: right; }
+.plutonb-profile td:first-child { text-align: left; font-family: monospace; }
+.plutonb-profile .flamegraph { margin-top: 1em; font-size: 0.75em; font-family: monospace; }
+.plutonb-profile .frame { display: inline-block; vertical-align: top; box-sizing: border-box; }
+.plutonb-profile .frame > span { display: block; overflow: hidden; white-space: nowrap; text-overflow: ellipsis;
+    background: #f4a460; border: 1px solid white; padding: 0 2px; }
+.plutonb-profile .children { display: flex; }
+"""
+
+# Pluto runs output scripts within a function and passes them `currentScript`, a page only sets `document.currentScript`.
+# No global names or inline handlers, the listeners are attached to the table next to the script.
+_SORT = """
+{
+    const script = typeof currentScript === "undefined" ? document.currentScript : currentScript;
+    const table = script.parentElement.querySelector("table");
+    const body = table.tBodies[0];
+    Array.from(table.tHead.rows[0].cells).forEach((th, column) => th.addEventListener("click", () => {
+        const descending = th.dataset.order !== "descending";
+        th.dataset.order = descending ? "descending" : "ascending";
+        const key = row => {
+            const cell = row.cells[column];
+            return cell.dataset.value === undefined ? cell.textContent : parseFloat(cell.dataset.value);
+        };
+        const rows = Array.from(body.rows).sort((a, b) => (key(a) > key(b) ? 1 : key(a) < key(b) ? -1 : 0) * (descending ? -1 : 1));
+        rows.forEach(row => body.appendChild(row));
+    }));
+}
+"""
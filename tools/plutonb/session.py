@@ -0,0 +1,126 @@
+"""A running notebook, reacting to widget input like Pluto does.
+
+`Session.set` changes the value of a bond, e.g. `country1`, and reruns every
+cell depending on it in the background. Input arriving while cells are still
+running supersedes them: the stale run is cancelled, see `executor.execute`,
+and the next run covers both the cells of the new input and those left
+unfinished. Scrolling through a dropdown thereby computes the last choice
+only, instead of queueing up one full run per intermediate value.
+
+    session = Session(Notebook.read("stream.py"), {"jl": jl})
+    session.start()
+    session.set("shift", 3)
+    session.wait()
+
+Several bonds changing together, e.g. from a preset or the url, are applied
+with `Session.update` or within `Session.transaction`, so that every cell
+depending on any of them runs once, not once per bond.
+
+    session.update({"country1": "China", "country2": "India", "yaxis": "co2"})
+"""
+
+import threading
+from contextlib import contextmanager
+
+from .executor import JULIA_NAMES, execute
+from .notebook import Graph
+
+
+class Session:
+    """Reactive execution of `notebook` in `namespace`. `executions` lists the runs done, latest last.
+
+    A `Profiler` accumulates the measurements of all cell runs of the session, e.g. to see which cells dominate interactions.
+    """
+
+    def __init__(self, notebook, namespace=None, workers=4, cache=None, julia_names=JULIA_NAMES, profiler=None):
+        self.notebook = notebook
+        self.namespace = {} if namespace is None else namespace
+        self.workers = workers
+        self.cache = cache
+        self.julia_names = julia_names
+        self.profiler = profiler
+        self.graph = Graph(notebook)
+        self.executions = []
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._dirty = set()
+        self._values = {}
+        self._busy = False
+        self._held = 0
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        """Run all cells, in a background thread, like opening the notebook."""
+        with self._condition:
+            self._dirty.update(self.graph.symbols)
+            self._generation += 1
+            self._condition.notify_all()
+        self._thread = threading.Thread(target=self._loop, name="session", daemon=True)
+        self._thread.start()
+        return self
+
+    def set(self, name, value):
+        """Set the bond `name` to `value` and rerun the cells depending on it, cancelling stale runs."""
+        self.update({name: value})
+
+    def update(self, values):
+        """Set several bonds at once. Cells depending on more than one of them still run once."""
+        with self._condition:
+            self._values.update(values)
+            self._dirty.update(self.affected(values))
+            self._generation += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def transaction(self):
+        """Collect all `set` and `update` calls within the block into a single run, started when leaving it."""
+        with self._condition:
+            self._held += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._held -= 1
+                self._condition.notify_all()
+
+    def affected(self, names):
+        """Cells to rerun once the variables `names` change, without the cells defining them."""
+        names = set(names)
+        direct = [cell_id for cell_id, symbols in self.graph.symbols.items() if symbols.referenced & names]
+        return self.graph.downstream_closure(direct)
+
+    def wait(self, timeout=None):
+        """Wait until all input is processed. Returns the latest execution, or `None` on timeout."""
+        with self._condition:
+            idle = self._condition.wait_for(lambda: not (self._busy or self._dirty or self._values), timeout)
+            return self.executions[-1] if idle and self.executions else None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._generation += 1
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or (not self._held and (self._dirty or self._values)))
+                if self._closed:
+                    return
+                generation = self._generation
+                cell_ids, self._dirty = self._dirty, set()
+                self.namespace.update(self._values)
+                self._values = {}
+                self._busy = True
+            execution = execute(
+                self.notebook, self.namespace, self.workers, cell_ids, self.julia_names, self.cache,
+                cancelled=lambda: self._generation != generation, profiler=self.profiler,
+            )
+            with self._condition:
+                self._dirty.update(cell_id for cell_id, run in execution.runs.items() if run.cancelled)
+                self.executions.append(execution)
+                self._busy = False
+                self._condition.notify_all()
@@ -0,0 +1,60 @@
+"""Cells restored by `plutonb.cellcache` behave as if they had been run.
+
+    python -m unittest discover tests
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from plutonb.cellcache import CellCache
+from plutonb.executor import execute
+from plutonb.notebook import Notebook
+
+
+def notebook(*cells):
+    cell_ids = [f"00000000-0000-0000-0001-{i:012d}" for i in range(len(cells))]
+    return Notebook("### A Pluto.jl notebook ###\n", dict(zip(cell_ids, cells)), [(c, True) for c in cell_ids])
+
+
+class CellCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = CellCache(directory.name)
+
+    def run_twice(self, cells):
+        """The namespaces of two runs of `cells`, the second one from the cache."""
+        runs = []
+        for _ in range(2):
+            namespace = {}
+            execution = execute(notebook(*cells), namespace, cache=self.cache)
+            self.assertEqual([run.error for run in execution.runs.values()], [None] * len(cells))
+            runs.append((namespace, execution))
+        return runs
+
+    def test_mutation_in_last_statement(self):
+        (first, _), (second, execution) = self.run_twice(["d = []", "c = 13", "d.append(c)"])
+        self.assertEqual(first["d"], [13])
+        self.assertEqual(second["d"], [13])
+        self.assertEqual([run.cached for run in execution.runs.values()], [True, True, False])
+
+    def test_mutation_of_own_value(self):
+        (first, _), (second, execution) = self.run_twice(["c = 13", "d = []\nd.append(c)"])
+        self.assertEqual(second["d"], first["d"])
+        self.assertTrue(all(run.cached for run in execution.runs.values()))
+
+    def test_stale_entry(self):
+        key = "ab" + "0" * 62
+        # an entry of a class which does not exist anymore
+        data = pickle.dumps(CellCacheTest).replace(b"CellCacheTest", b"RemovedClass1")
+        os.makedirs(os.path.dirname(self.cache.path(key)))
+        with open(self.cache.path(key), "wb") as file:
+            file.write(data)
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+"""The hourly refresh of the CO2 data in `dashboard.py`, against a local stand-in for the OWID server.
+
+The server answers with an `ETag` and `304 Not Modified` like the real one. Every
+step changes the served csv file and compares the incrementally updated data,
+matrices and summaries with those built from scratch.
+
+    python -m unittest discover tests
+"""
+
+import csv
+import hashlib
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from plutonb.notebook import Graph, Notebook
+
+DASHBOARD = os.path.join(os.path.dirname(__file__), "..", "..", "src", "JolinBasics", "dashboard.py")
+NAMES = ["LiveCSV", "LazyColumns", "ConditionalDownload", "SharedFeather", "pivot_years", "wide_matrix", "summarize_columns", "current_summary"]
+METRICS = ["co2", "gdp", "population"]
+OPTIONS = {"usecols": ["country", "iso_code", "year"], "sort_by": ["country", "year"], "keys": ["country", "year"]}
+
+
+def dashboard_namespace():
+    """The names of the data cells of the dashboard, without starting julia."""
+    notebook = Notebook.read(DASHBOARD)
+    graph = Graph(notebook)
+    cells = graph.upstream_closure({graph.definers[name] for name in NAMES})
+    namespace = {}
+    for cell_id in graph.topological_order(cells):
+        if "jl" not in graph.symbols[cell_id].referenced | graph.symbols[cell_id].defined:
+            exec(compile(notebook.cells[cell_id], cell_id, "exec"), namespace)
+    return namespace
+
+
+def csv_text(rows):
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(["country", "year", "iso_code", *METRICS])
+    writer.writerows(rows)
+    return text.getvalue()
+
+
+class Server(ThreadingHTTPServer):
+    """Serves `content` at any path, answering `If-None-Match` with 304. `statuses` lists the responses.
+
+    With `hold` set, only the first `split` bytes are sent until `hold` is set, like a slow download.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.content = b""
+        self.statuses = []
+        self.hold = None
+        self.split = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/owid-co2-data.csv"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content = self.server.content
+        etag = f'"{hashlib.sha256(content).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.statuses.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.server.statuses.append(200)
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.server.hold is None:
+            self.wfile.write(content)
+            return
+        self.wfile.write(content[:self.server.split])
+        self.wfile.flush()
+        self.server.hold.wait(10)
+        self.wfile.write(content[self.server.split:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RefreshTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.ns = dashboard_namespace()
+        except ImportError as error:
+            raise unittest.SkipTest(f"dashboard dependencies missing: {error}")
+        import pandas
+
+        cls.pd = pandas
+
+    def setUp(self):
+        self.server = Server()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        generator = random.Random(0)
+        countries = ["World", "Germany", "Bonaire, Sint Eustatius and Saba", "China", "India", "Zimbabwe"]
+        self.rows = [
+            [country, year, country[:3].upper(),
+             *(None if generator.random() < 0.2 else round(generator.lognormvariate(0, 2), 4) for _ in METRICS)]
+            for year in range(1990, 2000) for country in countries
+        ]
+        # not sorted by country, as the real file is not sorted the way the dashboard wants it
+        generator.shuffle(self.rows)
+        self.serve()
+
+    def serve(self):
+        self.server.content = csv_text(self.rows).encode()
+
+    def test_conditional_download(self):
+        download = self.ns["ConditionalDownload"](self.server.url, os.path.join(self.temporary(), "owid.csv"))
+        path = download.fetch()
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), self.server.content)
+        self.assertEqual(download.size, len(self.server.content))
+        self.assertIsNone(download.fetch())
+        self.rows[0][3] = 42.0
+        self.serve()
+        self.assertEqual(download.fetch(), path)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), self.server.content)
+        self.assertEqual(self.server.statuses, [200, 304, 200])
+
+    def test_updates_match_full_rebuild(self):
+        source = self.ns["LiveCSV"](self.server.url, **OPTIONS)
+        source.loading.join()
+        owid = source.refresh()
+        wide_cache, summary_cache = {}, {}
+        self.check(owid, wide_cache, summary_cache)
+
+        steps = [
+            ("unchanged", lambda: None, {"changed": 0, "added": 0, "removed": 0}),
+            ("changed", lambda: self.rows[7].__setitem__(3, 42.0), {"changed": 1, "added": 0, "removed": 0}),
+            ("missing value", lambda: self.rows[8].__setitem__(4, None), {"changed": 1, "added": 0, "removed": 0}),
+            ("added", lambda: self.rows.extend([
+                ["World", 2000, "WOR", 1.5, 7.0, None],
+                ["Atlantis", 1999, "ATL", 2.0, None, 3.0],
+            ]), {"changed": 0, "added": 2, "removed": 0}),
+            ("removed", lambda: self.rows.__setitem__(slice(None), [row for row in self.rows if row[0] != "Zimbabwe"]),
+             {"changed": 0, "added": 0, "removed": 10}),
+            ("reordered", lambda: random.Random(1).shuffle(self.rows), {"changed": 0, "added": 0, "removed": 0}),
+        ]
+        for name, change, delta in steps:
+            with self.subTest(name):
+                version = owid.version
+                change()
+                self.serve()
+                self.assertIs(source.refresh(), owid)
+                changed = name not in ["unchanged", "reordered"]
+                self.assertEqual(owid.version, version + changed)
+                if owid.delta is not None:
+                    self.assertEqual({key: owid.delta[key] for key in delta}, delta)
+                self.check(owid, wide_cache, summary_cache)
+
+    def test_partial_download(self):
+        content = self.server.content
+        self.server.split = len(content) // 2
+        self.server.hold = threading.Event()
+        self.addCleanup(self.server.hold.set)
+        prefix = content[:content.rindex(b"\n", 0, self.server.split) + 1]
+        source = self.ns["LiveCSV"](self.server.url, **OPTIONS)
+        deadline = time.monotonic() + 10
+        while source.download.size < len(prefix) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        owid = source.refresh()
+        self.assertTrue(source.partial)
+        self.assertEqual(source.columns(), ["country", "year", "iso_code", *METRICS])
+
+        # the rows so far are those of the complete lines received, as if parsed at once
+        path = os.path.join(self.temporary(), "prefix.csv")
+        with open(path, "wb") as file:
+            file.write(prefix)
+        expected = self.ns["LazyColumns"](path, **OPTIONS)
+        self.pd.testing.assert_frame_equal(owid.frame, expected.frame)
+        self.pd.testing.assert_frame_equal(owid.read(METRICS), expected.read(METRICS))
+
+        # nothing new arrived, nothing changes
+        version = owid.version
+        self.assertIs(source.refresh(), owid)
+        self.assertEqual(owid.version, version)
+
+        self.server.hold.set()
+        self.assertIs(source.complete(), owid)
+        self.assertFalse(source.partial)
+        self.assertEqual(owid.version, version + 1)
+        self.check(owid, {}, {})
+        self.assertIs(source.refresh(), owid)
+        self.assertEqual(owid.version, version + 1)
+        self.assertEqual(self.server.statuses, [200, 304])
+
+    def test_extend_matches_full_parse(self):
+        path = os.path.join(self.temporary(), "owid.csv")
+        with open(path, "wb") as file:
+            file.write(self.server.content)
+        content = self.server.content
+        ends = [i + 1 for i, byte in enumerate(content) if byte == ord("\n")]
+        grown = self.ns["LazyColumns"](path, size=ends[0], **OPTIONS)
+        grown.load("gdp")
+        for end in ends[3::7] + [len(content)]:
+            grown.extend(end)
+            expected = self.ns["LazyColumns"](path, size=end, **OPTIONS)
+            expected.load("gdp")
+            self.pd.testing.assert_frame_equal(grown.frame, expected.frame)
+            self.assertTrue((grown.hashes == expected.hashes).all())
+            self.assertEqual(grown.order is None, expected.order is None)
+            if grown.order is not None:
+                self.assertTrue((grown.order == expected.order).all())
+        self.assertEqual(grown.extend(len(content)), 0)
+
+    def test_shared_file_of_other_version(self):
+        directory = self.temporary()
+        first = self.ns["LiveCSV"](self.server.url, shared=self.ns["SharedFeather"]("owid", directory), **OPTIONS)
+        first.complete()
+        # the same rows with another value, as another kernel would download it an update later
+        self.rows[0][3] = 42.0
+        self.serve()
+        second = self.ns["LiveCSV"](self.server.url, shared=self.ns["SharedFeather"]("owid", directory), **OPTIONS)
+        owid = second.complete()
+        self.assertIsNotNone(owid.shared)
+        full = self.ns["LazyColumns"](owid.path, **OPTIONS)
+        self.pd.testing.assert_frame_equal(owid.read(METRICS), full.read(METRICS))
+        self.assertEqual(second.shared.source(), second.download.source())
+
+    def check(self, owid, wide_cache, summary_cache):
+        """Compare `owid` and what is derived from it incrementally with a rebuild from its file."""
+        pd, ns = self.pd, self.ns
+        owid.load("co2")
+        full = ns["LazyColumns"](owid.path, **OPTIONS)
+        full.load(*owid.frame.columns)
+        pd.testing.assert_frame_equal(owid.frame, full.frame)
+        pd.testing.assert_frame_equal(owid.read(["gdp"]), full.read(["gdp"]))
+        pd.testing.assert_frame_equal(
+            ns["wide_matrix"](owid, "co2", wide_cache), ns["pivot_years"](full.frame, "co2"), check_index_type=False,
+        )
+        # the patched summary indexes countries by plain strings, not categories
+        summary, expected = (
+            frame.reset_index().astype({"country": str})
+            for frame in [ns["current_summary"](owid, METRICS, summary_cache), ns["summarize_columns"](full, METRICS)]
+        )
+        pd.testing.assert_frame_equal(summary, expected)
+
+    def temporary(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return directory.name
+
+
+if __name__ == "__main__":
+    unittest.main()
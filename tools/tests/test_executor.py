@@ -0,0 +1,48 @@
+"""Concurrent runs of `plutonb.executor` give the results of Pluto's sequential order.
+
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from plutonb.executor import execute
+from plutonb.notebook import Notebook
+
+
+def notebook(*cells):
+    cell_ids = [f"00000000-0000-0000-0001-{i:012d}" for i in range(len(cells))]
+    return Notebook("### A Pluto.jl notebook ###\n", dict(zip(cell_ids, cells)), [(c, True) for c in cell_ids])
+
+
+class ExecutorTest(unittest.TestCase):
+    def results(self, cells, names, runs=20):
+        """The values of `names` after every one of `runs` runs of `cells`."""
+        results = set()
+        for _ in range(runs):
+            namespace = {}
+            execution = execute(notebook(*cells), namespace, workers=4)
+            self.assertTrue(all(run.error is None for run in execution.runs.values()))
+            results.add(tuple(repr(namespace[name]) for name in names))
+        return results
+
+    def test_read_after_mutation(self):
+        cells = ["import time\nd = []", "time.sleep(0.01)\nd.append(1)", "e = len(d)"]
+        self.assertEqual(self.results(cells, ["e"]), {("1",)})
+
+    def test_mutation_after_read(self):
+        cells = ["import time\nd = []", "time.sleep(0.01)\ne = len(d)", "d.append(1)"]
+        self.assertEqual(self.results(cells, ["e", "d"]), {("0", "[1]")})
+
+    def test_mutations_in_order(self):
+        cells = ["import time\nd = []", "time.sleep(0.01)\nd.append(1)", "d.append(2)", "s = sum(d)"]
+        self.assertEqual(self.results(cells, ["d", "s"]), {("[1, 2]", "3")})
+
+    def test_independent_cells_concurrent(self):
+        cells = ["import time", "time.sleep(0.2)\na = 1", "time.sleep(0.2)\nb = 2", "c = a + b"]
+        execution = execute(notebook(*cells), {}, workers=4)
+        self.assertLess(execution.seconds, 0.35)
+        self.assertEqual(len(execution.critical_path()[0]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""`plutonb.export` writes the collection index of a featured source, with a stand-in for julia.
+
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+from plutonb.bondcache import notebook_hash
+from plutonb.export import export
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+
+# called as `julia --startup-file=no -e <code> <notebook> <output directory>`, writes the HTML
+FAKE_JULIA = f"""#!{sys.executable}
+import os, sys
+notebook, target = sys.argv[-2:]
+name = os.path.splitext(os.path.basename(notebook))[0]
+with open(os.path.join(target, name + ".html"), "w") as file:
+    file.write("<html></html>")
+"""
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.join(directory.name, "src")
+        os.makedirs(os.path.join(self.root, "JolinBasics"))
+        for name in ["dashboard.py", "stream.py"]:
+            shutil.copy(os.path.join(SRC, "JolinBasics", name), os.path.join(self.root, "JolinBasics", name))
+        with open(os.path.join(directory.name, "pluto_export_configuration.json"), "w") as file:
+            json.dump({"title": "Featured", "collections": [{"title": "Jolin", "tags": ["jolin"]}]}, file)
+        self.julia = os.path.join(directory.name, "julia")
+        with open(self.julia, "w") as file:
+            file.write(FAKE_JULIA)
+        os.chmod(self.julia, os.stat(self.julia).st_mode | stat.S_IEXEC)
+        self.output = os.path.join(directory.name, "build")
+
+    def index(self):
+        with open(os.path.join(self.output, "pluto_export.json"), encoding="utf-8") as file:
+            return json.load(file)
+
+    def test_index(self):
+        results = export(self.root, self.output, julia=self.julia)
+        self.assertEqual({result["status"] for result in results}, {"exported"})
+        index = self.index()
+        self.assertEqual(index["title"], "Featured")
+        self.assertEqual(index["collections"], [{"title": "Jolin", "tags": ["jolin"]}])
+        self.assertEqual(index["format_version"], 1)
+        self.assertEqual(sorted(index["notebooks"]), ["JolinBasics/dashboard.py", "JolinBasics/stream.py"])
+        entry = index["notebooks"]["JolinBasics/dashboard.py"]
+        self.assertEqual(entry["html_path"], "JolinBasics/dashboard.html")
+        self.assertTrue(os.path.exists(os.path.join(self.output, entry["html_path"])))
+        self.assertEqual(entry["hash"], notebook_hash(os.path.join(self.root, "JolinBasics", "dashboard.py")))
+        self.assertIn("jolin", entry["frontmatter"]["tags"])
+
+    def test_index_without_changes(self):
+        export(self.root, self.output, julia=self.julia)
+        index = self.index()
+        results = export(self.root, self.output, julia=self.julia)
+        self.assertEqual({result["status"] for result in results}, {"unchanged"})
+        self.assertEqual(self.index(), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Reduced notebooks of `plutonb.isolate` keep the indices used by `isolated_cell` views.
+
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+
+from plutonb.isolate import isolate
+from plutonb.notebook import Notebook, upstream_closure
+
+DASHBOARD = os.path.join(os.path.dirname(__file__), "..", "..", "src", "JolinBasics", "dashboard.py")
+
+
+class IsolateTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = directory.name
+        self.notebook = Notebook.read(DASHBOARD)
+
+    def test_indices_unchanged(self):
+        indices = [1, 2, len(self.notebook.order) - 5]
+        reduced = Notebook.read(isolate(DASHBOARD, indices, self.cache))
+        self.assertEqual(reduced.order, self.notebook.order)
+        cell_ids = [self.notebook.order[index][0] for index in indices]
+        closure = upstream_closure(self.notebook, cell_ids)
+        for index in indices:
+            cell_id = reduced.order[index][0]
+            self.assertEqual(reduced.cells[cell_id], self.notebook.cells[cell_id])
+        for cell_id, code in reduced.cells.items():
+            if cell_id in closure or cell_id.startswith("00000000-0000-0000-0000-"):
+                self.assertEqual(code, self.notebook.cells[cell_id])
+            else:
+                self.assertEqual(code.strip(), "")
+        self.assertLess(len(closure), len(self.notebook.code_cells()))
+
+    def test_cached(self):
+        path = isolate(DASHBOARD, [2, 1], self.cache)
+        self.assertEqual(isolate(DASHBOARD, [1, 2], self.cache), path)
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            isolate(DASHBOARD, [len(self.notebook.order)], self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()